@@ -0,0 +1,86 @@
+"""
+Optional torch.compile decode path for the MIDI-LLM server
+
+Opt-in with MIDI_LLM_COMPILED_DECODE=1. Generation switches to a static KV
+cache and transformers' auto-compile of the decoding forward pass, using
+the inductor "max-autotune-no-cudagraphs" mode so the same path runs on CPU
+(for local testing) and GPU without CUDA graphs.
+
+Compiled artifacts survive container restarts in two layers, both kept on
+a Modal Volume:
+- TORCHINDUCTOR_CACHE_DIR (FX graph / autotune caches)
+- a torch.compiler "mega-cache" blob saved after warm-up and loaded before
+  the first compile
+
+Shapes are static, so the KV cache is sized once for the worst case
+(`max_cache_len`) and reused by every request; each distinct batch size
+still compiles once.
+"""
+
+import os
+from typing import Optional
+
+MEGA_CACHE_FILE = "mega_cache.bin"
+
+
+def compiled_decode_enabled() -> bool:
+    return os.environ.get("MIDI_LLM_COMPILED_DECODE", "0") == "1"
+
+
+def configure_compile_cache(cache_dir: str) -> bool:
+    """
+    Point inductor's on-disk caches at `cache_dir` and load saved artifacts
+
+    Must run before the first compile. Returns True if a mega-cache blob
+    from a previous container was loaded.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ["TORCHINDUCTOR_CACHE_DIR"] = os.path.join(cache_dir, "inductor")
+    os.environ["TORCHINDUCTOR_FX_GRAPH_CACHE"] = "1"
+    os.environ["TORCHINDUCTOR_AUTOGRAD_CACHE"] = "1"
+
+    import torch
+
+    path = os.path.join(cache_dir, MEGA_CACHE_FILE)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "rb") as f:
+            torch.compiler.load_cache_artifacts(f.read())
+        return True
+    except Exception as e:
+        print(f"[MIDI-LLM] Ignoring unreadable compile cache: {type(e).__name__}: {e}")
+        return False
+
+
+def save_compile_cache(cache_dir: str) -> int:
+    """Persist compiled artifacts produced so far; returns bytes written"""
+    import torch
+
+    artifacts = torch.compiler.save_cache_artifacts()
+    if artifacts is None:
+        return 0
+    blob, _ = artifacts
+    path = os.path.join(cache_dir, MEGA_CACHE_FILE)
+    with open(path + ".tmp", "wb") as f:
+        f.write(blob)
+    os.replace(path + ".tmp", path)
+    return len(blob)
+
+
+def enable_compiled_decode(model, max_cache_len: int = 4096, mode: Optional[str] = None) -> None:
+    """Make `model.generate` use a static KV cache and a compiled forward"""
+    from transformers import CompileConfig
+
+    compile_config = CompileConfig(
+        fullgraph=True,
+        dynamic=False,
+        mode=mode or "max-autotune-no-cudagraphs",
+    )
+    # transformers only auto-compiles on accelerators unless asked to
+    compile_config._compile_all_devices = True
+
+    model.generation_config.cache_implementation = "static"
+    model.generation_config.compile_config = compile_config
+    # One cache shape for all prompt/max_length combinations avoids recompiles
+    model.generation_config.max_cache_len = max_cache_len
@@ -0,0 +1,224 @@
+"""
+Persistent generation log for the MIDI-LLM server
+
+Every generation is queued in memory and written by a background thread
+as Parquet part files (one per flush) under a Modal Volume, so the request
+path never waits on disk I/O. The reader half turns the log into a dataset
+for tuning sampling params and diagnosing conversion failures (Issue #2).
+
+Usage (reader, after `modal volume get midi-llm-generation-log / ./log`):
+    python generation_log.py ./log --by temperature top_p
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Optional, Sequence
+
+# Columns written for every generation
+SCHEMA_FIELDS = (
+    "timestamp",
+    "prompt_hash",
+    "model",
+    "temperature",
+    "top_p",
+    "max_length",
+    "instrument",
+    "genre",
+    "difficulty",
+    "n_outputs",
+    "input_tokens",
+    "tokens",
+    "success_index",
+    "errors",
+    "tokenize_ms",
+    "generate_ms",
+    "convert_ms",
+    "total_ms",
+)
+
+# Queued by close(): wakes the writer thread for its final flush
+_STOP = object()
+
+
+def prompt_hash(prompt: str) -> str:
+    """Stable identifier for a prompt without storing its text"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("prompt_hash", pa.string()),
+        ("model", pa.string()),
+        ("temperature", pa.float64()),
+        ("top_p", pa.float64()),
+        ("max_length", pa.int32()),
+        ("instrument", pa.string()),
+        ("genre", pa.string()),
+        ("difficulty", pa.string()),
+        ("n_outputs", pa.int8()),
+        ("input_tokens", pa.int32()),
+        ("tokens", pa.list_(pa.list_(pa.int32()))),
+        ("success_index", pa.int8()),
+        ("errors", pa.list_(pa.string())),
+        ("tokenize_ms", pa.float32()),
+        ("generate_ms", pa.float32()),
+        ("convert_ms", pa.float32()),
+        ("total_ms", pa.float32()),
+    ])
+
+
+class GenerationLogWriter:
+    """
+    Asynchronous, batched Parquet writer
+
+    `append` only enqueues; a daemon thread drains the queue and writes a
+    part file every `flush_interval` seconds or `max_batch` records.
+    Records are dropped (and counted) rather than blocking when the queue
+    is full.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        flush_interval: float = 30.0,
+        max_batch: int = 64,
+        max_queue: int = 1024,
+        on_flush: Optional[Callable[[], None]] = None,
+    ):
+        self.root_dir = root_dir
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.on_flush = on_flush
+        self.dropped = 0
+        self.written = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="generation-log", daemon=True)
+        self._thread.start()
+
+    def append(self, record: dict) -> None:
+        """Queue one generation record (never blocks)"""
+        if self._stop.is_set():
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write every queued record (and run on_flush), then stop the writer thread"""
+        self._stop.set()
+        try:
+            # Wakes the writer even while it waits out the flush interval
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("[GenerationLog] Writer not draining; queued records may be lost")
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                record = None
+
+            stopping = record is _STOP
+            if stopping:
+                while True:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record is not _STOP:
+                        batch.append(record)
+            elif record is not None:
+                batch.append(record)
+
+            if batch and (len(batch) >= self.max_batch or time.monotonic() >= deadline or stopping):
+                self._flush(batch)
+                batch = []
+            if stopping:
+                return
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch: list) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            columns = {name: [record.get(name) for record in batch] for name in SCHEMA_FIELDS}
+            # Token rows arrive as numpy arrays; convert here, off the request path
+            columns["tokens"] = [
+                [row.tolist() if hasattr(row, "tolist") else list(row) for row in tokens]
+                if tokens is not None else None
+                for tokens in columns["tokens"]
+            ]
+            table = pa.Table.from_pydict(columns, schema=_schema())
+
+            day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+            part_dir = os.path.join(self.root_dir, f"date={day}")
+            os.makedirs(part_dir, exist_ok=True)
+            path = os.path.join(part_dir, f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}.parquet")
+            pq.write_table(table, path, compression="zstd")
+            self.written += len(batch)
+
+            if self.on_flush:
+                self.on_flush()
+        except Exception as e:
+            print(f"[GenerationLog] Failed to write {len(batch)} records: {type(e).__name__}: {e}")
+
+
+def load_log(root_dir: str, columns: Optional[Sequence[str]] = None):
+    """Load the whole log (all date partitions) as a pyarrow Table"""
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(root_dir, format="parquet", partitioning="hive")
+    return dataset.to_table(columns=list(columns) if columns else None)
+
+
+def failure_rates(root_dir: str, by: Sequence[str] = ("temperature",)) -> list:
+    """
+    Failure rate of generations grouped by the given parameter columns
+
+    Returns a list of dicts with the group keys plus `count`, `failures`
+    and `failure_rate`, sorted by failure rate (worst first).
+    """
+    import pyarrow.compute as pc
+
+    table = load_log(root_dir, columns=[*by, "success_index"])
+    failed = pc.cast(pc.less(table["success_index"], 0), "int32")
+    table = table.append_column("failed", failed)
+
+    grouped = table.group_by(list(by)).aggregate([("failed", "sum"), ("failed", "count")])
+    rows = []
+    for row in grouped.to_pylist():
+        count = row.pop("failed_count")
+        failures = row.pop("failed_sum")
+        rows.append({**row, "count": count, "failures": failures, "failure_rate": failures / count})
+    return sorted(rows, key=lambda r: r["failure_rate"], reverse=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query MIDI-LLM generation failure rates")
+    parser.add_argument("root_dir", help="Local copy of the generation log volume")
+    parser.add_argument("--by", nargs="+", default=["temperature"], help="Parameter columns to group by")
+    args = parser.parse_args()
+
+    for row in failure_rates(args.root_dir, by=args.by):
+        keys = ", ".join(f"{k}={row[k]}" for k in args.by)
+        print(f"{keys}: {row['failures']}/{row['count']} failed ({row['failure_rate']:.1%})")
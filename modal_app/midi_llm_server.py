@@ -6,9 +6,14 @@ using Modal.com infrastructure with GPU support.
 """
 
 import modal
+from datetime import datetime, timezone
 from typing import Optional
 import base64
 import io
+import os
+import time
+
+from model_registry import DEFAULT_MODEL_KEY, MODEL_REGISTRY
 
 # Define Modal app
 app = modal.App("midi-llm-server")
@@ -25,32 +30,74 @@ image = (
         "numpy",
         "accelerate",
         "sentencepiece",
+        "pyarrow",
+        "bitsandbytes",
     )
     # Install anticipation library for MIDI token conversion
     .pip_install(
         "git+https://github.com/jthickstun/anticipation.git@af37397922665a0fb8d474d7988b0f3755a38d45"
     )
+    .add_local_python_source("generation_log", "warm_pool", "compiled_decode", "model_registry")
 )
 
+# Columnar generation log (Parquet parts), read back with generation_log.py
+GENERATION_LOG_DIR = "/generation-log"
+generation_log_volume = modal.Volume.from_name("midi-llm-generation-log", create_if_missing=True)
+
+# torch.compile artifacts for the opt-in compiled decode path (MIDI_LLM_COMPILED_DECODE=1)
+COMPILE_CACHE_DIR = "/compile-cache"
+compile_cache_volume = modal.Volume.from_name("midi-llm-compile-cache", create_if_missing=True)
+
+# Warm-pool state: (timestamp, model key) request events from the endpoint,
+# lifecycle and latency metrics per model (best-effort counters, not transactional)
+request_events = modal.Queue.from_name("midi-llm-request-events", create_if_missing=True)
+warm_pool_metrics_dict = modal.Dict.from_name("midi-llm-warm-pool-metrics", create_if_missing=True)
+
+# Tags a (tag, ts, model_key, warmup_ms or None) event on request_events
+COLD_START_EVENT = "cold_start"
+
+# Upper bound for pre-warmed containers per model
+MAX_WARM_CONTAINERS = int(os.environ.get("MIDI_LLM_MAX_WARM_CONTAINERS", "3"))
+
 
 @app.cls(
     image=image,
-    gpu="A10G",  # 24GB VRAM, sufficient for MIDI-LLM (1.4B params)
+    gpu="A10G",  # Default for the full model; see model_instance() for per-model GPUs
     scaledown_window=300,  # 5 minutes
     timeout=600,  # 10 minutes max per request
+    volumes={
+        GENERATION_LOG_DIR: generation_log_volume,
+        COMPILE_CACHE_DIR: compile_cache_volume,
+    },
 )
 class MidiLlmModel:
     """MIDI-LLM model class for text-to-MIDI generation"""
 
+    # Registry key (see model_registry.py); each value gets its own container pool
+    model_key: str = modal.parameter(default="full")
+
     @modal.enter()
     def load_model(self):
         """Load MIDI-LLM model on container startup"""
         import torch
-        from transformers import AutoModelForCausalLM, AutoTokenizer
+        from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+        from compiled_decode import (
+            compiled_decode_enabled,
+            configure_compile_cache,
+            enable_compiled_decode,
+            save_compile_cache,
+        )
+
+        # Compile caches must be configured before anything is compiled
+        self.compiled_decode = compiled_decode_enabled()
+        if self.compiled_decode:
+            cache_loaded = configure_compile_cache(os.path.join(COMPILE_CACHE_DIR, self.model_key))
+            print(f"[MIDI-LLM] Compiled decode enabled (cached artifacts loaded: {cache_loaded})")
 
-        print("[MIDI-LLM] Loading model from Hugging Face...")
+        self.spec = MODEL_REGISTRY[self.model_key]
+        model_id = self.spec["model_id"]
 
-        model_id = "slseanwu/MIDI-LLM_Llama-3.2-1B"
+        print(f"[MIDI-LLM] Loading model '{self.model_key}' ({self.spec['name']}) from Hugging Face...")
 
         # Load tokenizer
         self.tokenizer = AutoTokenizer.from_pretrained(
@@ -59,11 +106,16 @@ class MidiLlmModel:
             trust_remote_code=True,
         )
 
-        # Load model with BFloat16 for efficiency
+        # Load model in the registry dtype (BFloat16 for the full model),
+        # optionally with int8 weights for the cheap tier
+        quantization_config = None
+        if self.spec["quantization"] == "int8":
+            quantization_config = BitsAndBytesConfig(load_in_8bit=True)
         self.model = AutoModelForCausalLM.from_pretrained(
             model_id,
-            torch_dtype=torch.bfloat16,
+            torch_dtype=getattr(torch, self.spec["dtype"]),
             device_map="auto",
+            quantization_config=quantization_config,
             trust_remote_code=True,
         )
 
@@ -78,8 +130,80 @@ class MidiLlmModel:
             "Ensure that the music is coherent, musical, and follows the user's requests."
         )
 
+        # Generation log is written off the request path by a background thread
+        from generation_log import GenerationLogWriter
+        self.generation_log = GenerationLogWriter(
+            GENERATION_LOG_DIR,
+            on_flush=generation_log_volume.commit,
+        )
+
+        if self.compiled_decode:
+            enable_compiled_decode(self.model)
+
         print(f"[MIDI-LLM] Model loaded successfully on {self.model.device}")
 
+        # Every container start is a cold start; run a tiny generate so CUDA
+        # kernels are compiled before the first real request arrives
+        # A failed warm-up only costs the first request its compile time
+        try:
+            warmup_ms = self._warmup()
+        except Exception as e:
+            print(f"[MIDI-LLM] Warm-up failed, serving cold: {type(e).__name__}: {e}")
+            warmup_ms = None
+        # Containers start in bursts; prewarm_controller is the only writer of the counters
+        try:
+            request_events.put((COLD_START_EVENT, time.time(), self.model_key, warmup_ms), block=False)
+        except Exception as e:
+            print(f"[MIDI-LLM] Failed to record cold start event: {e}")
+
+        # The warm-up compiled the decode graph; keep it for the next container
+        if self.compiled_decode:
+            saved = save_compile_cache(os.path.join(COMPILE_CACHE_DIR, self.model_key))
+            compile_cache_volume.commit()
+            print(f"[MIDI-LLM] Saved {saved} bytes of compile artifacts")
+
+    def _warmup(self) -> float:
+        """Generate a few tokens from the MIDI BOS prompt; returns elapsed ms"""
+        import torch
+
+        started_at = time.perf_counter()
+        input_ids = torch.tensor(
+            [[self.AMT_GPT2_BOS_ID + self.LLAMA_VOCAB_SIZE]], device=self.model.device
+        )
+        # Sampling, as in generate(): greedy decoding rejects num_return_sequences > 1.
+        # Seeded inside a forked RNG so real requests never see a reset generator
+        device = self.model.device
+        cuda_devices = []
+        if device.type == "cuda":
+            cuda_devices = [device.index if device.index is not None else torch.cuda.current_device()]
+        with torch.random.fork_rng(devices=cuda_devices), torch.no_grad():
+            torch.manual_seed(0)
+            self.model.generate(
+                input_ids,
+                max_new_tokens=8,
+                do_sample=True,
+                num_return_sequences=4,  # same batch shape as generate()
+                pad_token_id=self.tokenizer.eos_token_id,
+            )
+        warmup_ms = (time.perf_counter() - started_at) * 1000
+        print(f"[MIDI-LLM] Warm-up generate took {warmup_ms:.0f}ms")
+        return warmup_ms
+
+    @modal.method()
+    def warmup(self) -> dict:
+        """Cheap health check: runs the warm-up generate on this container"""
+        return {
+            "healthy": True,
+            "modelKey": self.model_key,
+            "device": str(self.model.device),
+            "warmupMs": round(self._warmup(), 1),
+        }
+
+    @modal.exit()
+    def close_generation_log(self):
+        """Flush pending generation log records before the container stops"""
+        self.generation_log.close()
+
     @modal.method()
     def generate(
         self,
@@ -108,7 +232,9 @@ class MidiLlmModel:
         """
         import torch
         from anticipation.convert import events_to_midi
+        from generation_log import prompt_hash
 
+        started_at = time.perf_counter()
         print(f"[MIDI-LLM] Generating MIDI for prompt: {prompt[:80]}...")
 
         # Build full prompt with system message
@@ -124,6 +250,7 @@ class MidiLlmModel:
             torch.tensor([[midi_bos_token]], dtype=input_ids.dtype)
         ], dim=1).to(self.model.device)
 
+        tokenized_at = time.perf_counter()
         print(f"[MIDI-LLM] Input tokens: {input_ids.shape[1]}, generating up to {max_length} MIDI tokens...")
 
         # Generate multiple outputs (like official code) to increase success rate
@@ -139,17 +266,51 @@ class MidiLlmModel:
                 pad_token_id=self.tokenizer.eos_token_id,
             )
 
+        generated_at = time.perf_counter()
         print(f"[MIDI-LLM] Generated {n_outputs} sequences, trying to convert each one...")
 
+        # Drop the prompt on device and shift all rows back to the MIDI
+        # vocabulary range at once, so only the generated region crosses
+        # to the host (int32 is enough for both vocabularies).
+        prompt_length = input_ids.shape[1]
+        midi_tokens = (
+            (outputs[:, prompt_length:] - self.LLAMA_VOCAB_SIZE)
+            .to(torch.int32)
+            .cpu()
+            .numpy()
+        )
+        del outputs
+
+        def log_generation(success_index: int, errors: list) -> None:
+            finished_at = time.perf_counter()
+            self.generation_log.append({
+                "timestamp": datetime.now(timezone.utc),
+                "prompt_hash": prompt_hash(prompt),
+                "model": self.model_key,
+                "temperature": temperature,
+                "top_p": top_p,
+                "max_length": max_length,
+                "instrument": instrument,
+                "genre": genre,
+                "difficulty": difficulty,
+                "n_outputs": n_outputs,
+                "input_tokens": prompt_length,
+                "tokens": midi_tokens,
+                "success_index": success_index,
+                "errors": errors,
+                "tokenize_ms": (tokenized_at - started_at) * 1000,
+                "generate_ms": (generated_at - tokenized_at) * 1000,
+                "convert_ms": (finished_at - generated_at) * 1000,
+                "total_ms": (finished_at - started_at) * 1000,
+            })
+
+        errors = []
+
         # Try each generated sequence until one succeeds
         for output_idx in range(n_outputs):
             try:
-                # Extract generated tokens (remove input prompt)
-                generated_tokens = outputs[output_idx][input_ids.shape[1]:]
-
-                # Shift tokens back to MIDI vocabulary range
-                midi_tokens = generated_tokens.cpu().numpy() - self.LLAMA_VOCAB_SIZE
-                tokens_list = midi_tokens.tolist()
+                # Materialize the Python list only for the row being converted
+                tokens_list = midi_tokens[output_idx].tolist()
 
                 print(f"[MIDI-LLM] Sequence {output_idx+1}/{n_outputs}: {len(tokens_list)} tokens")
 
@@ -167,26 +328,31 @@ class MidiLlmModel:
                 midi_base64 = base64.b64encode(midi_binary).decode('utf-8')
 
                 print(f"[MIDI-LLM] Successfully generated MIDI: {metadata['noteCount']} notes, {metadata['duration']:.1f}s")
+                log_generation(output_idx, errors)
 
                 return {
                     "success": True,
                     "midiData": midi_base64,
                     "metadata": metadata,
-                    "model": "slseanwu/MIDI-LLM_Llama-3.2-1B",
+                    "model": self.spec["name"],
+                    "modelKey": self.model_key,
                 }
 
             except Exception as e:
                 print(f"[MIDI-LLM] Sequence {output_idx+1} failed: {type(e).__name__}: {str(e)}")
+                errors.append(f"{type(e).__name__}: {str(e)}")
                 continue
 
         # All sequences failed
         import traceback
         error_details = "All generated sequences failed to convert to valid MIDI"
         print(f"[MIDI-LLM] {error_details}")
+        log_generation(-1, errors)
         return {
             "success": False,
             "error": error_details,
-            "model": "slseanwu/MIDI-LLM_Llama-3.2-1B",
+            "model": self.spec["name"],
+            "modelKey": self.model_key,
         }
 
     def _analyze_midi(self, midi_bytes: bytes) -> dict:
@@ -231,6 +397,11 @@ class MidiLlmModel:
             }
 
 
+def model_instance(model_key: str) -> "MidiLlmModel":
+    """MidiLlmModel bound to a registry entry (own GPU type and container pool)"""
+    return MidiLlmModel.with_options(gpu=MODEL_REGISTRY[model_key]["gpu"])(model_key=model_key)
+
+
 @app.function(image=image)
 @modal.fastapi_endpoint(method="POST")
 def generate_midi(data: dict) -> dict:
@@ -242,19 +413,150 @@ def generate_midi(data: dict) -> dict:
         "prompt": "...",
         "temperature": 0.8,
         "max_length": 512,
+        "model": "full" | "lite",  (optional, otherwise routed)
         ...
     }
+
+    The response carries the chosen model and its latency stats (as of the
+    last prewarm_controller run).
     """
-    model = MidiLlmModel()
-    return model.generate.remote(
+    from model_registry import latency_summary, route_model
+
+    max_length = data.get("max_length", 512)
+    model_key = route_model(max_length, data.get("difficulty"), data.get("model"))
+
+    try:
+        request_events.put((time.time(), model_key), block=False)
+    except Exception as e:
+        print(f"[MIDI-LLM] Failed to record request event: {e}")
+
+    started_at = time.perf_counter()
+    result = model_instance(model_key).generate.remote(
         prompt=data.get("prompt", ""),
         temperature=data.get("temperature", 0.8),
-        max_length=data.get("max_length", 512),
+        max_length=max_length,
         top_p=data.get("top_p", 0.95),
         instrument=data.get("instrument"),
         genre=data.get("genre"),
         difficulty=data.get("difficulty"),
     )
+    latency_ms = (time.perf_counter() - started_at) * 1000
+
+    # prewarm_controller folds latency events into the stats; it is their only writer
+    try:
+        request_events.put((time.time(), model_key, latency_ms), block=False)
+    except Exception as e:
+        print(f"[MIDI-LLM] Failed to record latency event: {e}")
+    result["latencyMs"] = round(latency_ms, 1)
+    result["modelStats"] = latency_summary(warm_pool_metrics_dict.get(f"latency:{model_key}"))
+    return result
+
+
+@app.function(image=image, schedule=modal.Period(minutes=1))
+def prewarm_controller():
+    """
+    Keep N containers warm based on the lesson schedule and request rate
+
+    Drains the events recorded by the endpoint, updates the EWMA request
+    rate and latency stats per model and sets `min_containers` on each
+    model's MidiLlmModel instance when its target changes. Events are
+    (ts, model_key) per request, (ts, model_key, latency_ms) per
+    completed request and (COLD_START_EVENT, ts, model_key, warmup_ms) per
+    container start (warmup_ms is None if the warm-up failed); bare
+    timestamps queued before per-model routing count as requests for the
+    default model.
+    """
+    import warm_pool
+    from model_registry import record_latency
+
+    requests = {key: 0 for key in MODEL_REGISTRY}
+    latencies = {key: [] for key in MODEL_REGISTRY}
+    cold_starts = {key: [] for key in MODEL_REGISTRY}  # (ts, warmup_ms or None)
+    while True:
+        batch = request_events.get_many(1000, block=False)
+        for event in batch:
+            if isinstance(event, (tuple, list)) and len(event) == 4 and event[0] == COLD_START_EVENT:
+                if event[2] in cold_starts:
+                    cold_starts[event[2]].append((event[1], event[3]))
+                continue
+            if isinstance(event, (int, float)):
+                event = (event, DEFAULT_MODEL_KEY)
+            if not isinstance(event, (tuple, list)) or len(event) < 2 or event[1] not in requests:
+                continue
+            if len(event) == 2:
+                requests[event[1]] += 1
+            else:
+                latencies[event[1]].append(event[2])
+        if len(batch) < 1000:
+            break
+
+    metrics = warm_pool_metrics_dict
+    for model_key, values in latencies.items():
+        if values:
+            stats = metrics.get(f"latency:{model_key}")
+            for latency_ms in values:
+                stats = record_latency(stats, latency_ms)
+            metrics[f"latency:{model_key}"] = stats
+    for model_key, starts in cold_starts.items():
+        if not starts:
+            continue
+        warmups = sorted((ts, ms) for ts, ms in starts if ms is not None)
+        metrics[f"cold_starts:{model_key}"] = metrics.get(f"cold_starts:{model_key}", 0) + len(starts)
+        if warmups:
+            metrics[f"warmups:{model_key}"] = metrics.get(f"warmups:{model_key}", 0) + len(warmups)
+            total = metrics.get(f"warmup_ms_total:{model_key}", 0.0) + sum(ms for _, ms in warmups)
+            metrics[f"warmup_ms_total:{model_key}"] = total
+            metrics[f"warmup_ms_last:{model_key}"] = warmups[-1][1]
+
+    schedule = warm_pool.parse_schedule(os.environ.get("MIDI_LLM_WARM_SCHEDULE"))
+    now = warm_pool.local_now()
+    for model_key, count in requests.items():
+        rate = warm_pool.update_request_rate(metrics.get(f"requests_per_minute:{model_key}"), count)
+        target = warm_pool.desired_containers(
+            schedule,
+            now,
+            requests_per_minute=rate,
+            seconds_per_request=float(os.environ.get("MIDI_LLM_SECONDS_PER_REQUEST", "30")),
+            max_warm=MAX_WARM_CONTAINERS,
+            model_key=model_key,
+        )
+        metrics[f"requests_per_minute:{model_key}"] = rate
+
+        if target != metrics.get(f"warm_target:{model_key}"):
+            model_instance(model_key).update_autoscaler(min_containers=target)
+            metrics[f"warm_target:{model_key}"] = target
+            print(f"[MIDI-LLM] Warm pool target for '{model_key}': {target} containers ({rate:.2f} req/min)")
+
+
+@app.function(image=image)
+@modal.fastapi_endpoint(method="GET")
+def warm_pool_metrics() -> dict:
+    """
+    Warm-pool metrics
+
+    GET /warm_pool_metrics
+    Returns per-model cold-start count, warm-up cost (averaged over the
+    warm-ups that succeeded), request rate, warm target and latency stats,
+    as of the last prewarm_controller run.
+    """
+    from model_registry import latency_summary
+
+    metrics = warm_pool_metrics_dict
+    result = {}
+    for model_key in MODEL_REGISTRY:
+        warmups = metrics.get(f"warmups:{model_key}", 0)
+        warmup_ms_total = metrics.get(f"warmup_ms_total:{model_key}", 0.0)
+        result[model_key] = {
+            "coldStarts": metrics.get(f"cold_starts:{model_key}", 0),
+            "warmUps": warmups,
+            "warmupMsLast": round(metrics.get(f"warmup_ms_last:{model_key}", 0.0), 1),
+            "warmupMsAvg": round(warmup_ms_total / warmups, 1) if warmups else 0.0,
+            "warmupMsTotal": round(warmup_ms_total, 1),
+            "requestsPerMinute": round(metrics.get(f"requests_per_minute:{model_key}", 0.0), 2),
+            "warmTarget": metrics.get(f"warm_target:{model_key}", 0),
+            "latency": latency_summary(metrics.get(f"latency:{model_key}")),
+        }
+    return result
 
 
 @app.local_entrypoint()
@@ -262,7 +564,7 @@ def main():
     """Test the MIDI-LLM model locally"""
     print("Testing MIDI-LLM model...")
 
-    model = MidiLlmModel()
+    model = model_instance(DEFAULT_MODEL_KEY)
     result = model.generate.remote(
         prompt="Generate a short C major scale for piano",
         temperature=0.7,
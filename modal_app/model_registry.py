@@ -0,0 +1,75 @@
+"""
+Model registry and request router for the MIDI-LLM server
+
+Each registry entry is served by its own parametrized MidiLlmModel
+instance (`MidiLlmModel.with_options(gpu=...)(model_key=...)`), so every
+model keeps an independent container pool and warm-pool target.
+
+Cheap requests (short `max_length` or beginner difficulty) go to the
+int8-quantized model on a smaller GPU; everything else goes to the full
+bf16 model.
+"""
+
+from typing import Optional, Sequence
+
+DEFAULT_MODEL_KEY = "full"
+
+MODEL_REGISTRY = {
+    "full": {
+        "name": "slseanwu/MIDI-LLM_Llama-3.2-1B",
+        "model_id": "slseanwu/MIDI-LLM_Llama-3.2-1B",
+        "gpu": "A10G",  # 24GB VRAM
+        "dtype": "bfloat16",
+        "quantization": None,
+    },
+    "lite": {
+        "name": "slseanwu/MIDI-LLM_Llama-3.2-1B (int8)",
+        "model_id": "slseanwu/MIDI-LLM_Llama-3.2-1B",
+        "gpu": "T4",  # 16GB VRAM, no bf16 support
+        "dtype": "float16",
+        "quantization": "int8",
+    },
+}
+
+# Requests at or below this many MIDI tokens are routed to the lite model
+CHEAP_MAX_LENGTH = 256
+CHEAP_DIFFICULTIES = {"beginner"}
+
+# Latency samples kept per model for percentile stats
+LATENCY_WINDOW = 100
+
+
+def route_model(max_length: int, difficulty: Optional[str] = None, requested: Optional[str] = None) -> str:
+    """Pick the registry key for a request; an explicit valid `requested` key wins"""
+    if requested in MODEL_REGISTRY:
+        return requested
+    if max_length <= CHEAP_MAX_LENGTH or (difficulty or "").lower() in CHEAP_DIFFICULTIES:
+        return "lite"
+    return DEFAULT_MODEL_KEY
+
+
+def record_latency(stats: Optional[dict], latency_ms: float) -> dict:
+    """Return updated per-model latency stats (count, total, recent window)"""
+    stats = dict(stats or {"count": 0, "total_ms": 0.0, "recent": []})
+    stats["count"] += 1
+    stats["total_ms"] += latency_ms
+    stats["recent"] = (stats["recent"] + [round(latency_ms, 1)])[-LATENCY_WINDOW:]
+    return stats
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(stats: Optional[dict]) -> dict:
+    """Summarize latency stats for the API response"""
+    if not stats or not stats["count"]:
+        return {"count": 0, "avgMs": 0.0, "p50Ms": 0.0, "p95Ms": 0.0}
+    recent = sorted(stats["recent"])
+    return {
+        "count": stats["count"],
+        "avgMs": round(stats["total_ms"] / stats["count"], 1),
+        "p50Ms": _percentile(recent, 0.5),
+        "p95Ms": _percentile(recent, 0.95),
+    }
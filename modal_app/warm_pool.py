@@ -0,0 +1,120 @@
+"""
+Warm-pool controller for the MIDI-LLM GPU class
+
+Decides how many containers to keep warm (`min_containers`) from two
+signals and takes the larger of them:
+
+1. A configurable lesson schedule (weekday + time windows, Asia/Tokyo by
+   default, per model key), so containers are already warm when a lesson
+   starts.
+2. A recent-request-rate estimate (EWMA over per-minute request counts),
+   so unscheduled bursts keep enough containers around.
+
+The pure functions here are driven by the scheduled `prewarm_controller`
+function in midi_llm_server.py.
+
+Schedule format (MIDI_LLM_WARM_SCHEDULE env var, JSON):
+    [
+        {"days": "mon-fri", "start": "08:45", "end": "12:30", "containers": 2},
+        {"days": "sat", "start": "09:45", "end": "17:00", "containers": 1, "model": "lite"}
+    ]
+Entries without "model" apply to the full model.
+"""
+
+import json
+import math
+from dataclasses import dataclass
+from datetime import datetime, time
+from typing import Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from model_registry import DEFAULT_MODEL_KEY
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+DEFAULT_TIMEZONE = "Asia/Tokyo"
+
+
+@dataclass
+class WarmWindow:
+    """Time window during which `containers` should be kept warm"""
+
+    days: List[int]  # 0 = Monday
+    start: time
+    end: time
+    containers: int
+    model_key: str = DEFAULT_MODEL_KEY
+
+    def contains(self, now: datetime) -> bool:
+        return now.weekday() in self.days and self.start <= now.time() < self.end
+
+
+def _parse_days(spec: str) -> List[int]:
+    days = []
+    for part in spec.lower().split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = (DAY_NAMES.index(d.strip()) for d in part.split("-"))
+            days.extend(range(first, last + 1))
+        else:
+            days.append(DAY_NAMES.index(part))
+    return days
+
+
+def parse_schedule(raw: Optional[str]) -> List[WarmWindow]:
+    """Parse the JSON schedule; an empty/missing value means no schedule"""
+    if not raw:
+        return []
+    return [
+        WarmWindow(
+            days=_parse_days(entry.get("days", "mon-sun")),
+            start=time.fromisoformat(entry["start"]),
+            end=time.fromisoformat(entry["end"]),
+            containers=int(entry["containers"]),
+            model_key=entry.get("model", DEFAULT_MODEL_KEY),
+        )
+        for entry in json.loads(raw)
+    ]
+
+
+def scheduled_containers(
+    schedule: Iterable[WarmWindow], now: datetime, model_key: str = DEFAULT_MODEL_KEY
+) -> int:
+    """Containers requested for `model_key` at `now` (max of overlapping windows)"""
+    return max(
+        (w.containers for w in schedule if w.model_key == model_key and w.contains(now)),
+        default=0,
+    )
+
+
+def update_request_rate(previous: Optional[float], requests_per_minute: float, alpha: float = 0.3) -> float:
+    """Exponentially weighted moving average of requests per minute"""
+    if previous is None:
+        return requests_per_minute
+    return alpha * requests_per_minute + (1 - alpha) * previous
+
+
+def rate_containers(requests_per_minute: float, seconds_per_request: float, headroom: float = 1.5) -> int:
+    """Containers needed to absorb the estimated rate (one request at a time per container)"""
+    busy_containers = requests_per_minute * seconds_per_request / 60.0
+    return math.ceil(busy_containers * headroom) if busy_containers > 0 else 0
+
+
+def desired_containers(
+    schedule: Iterable[WarmWindow],
+    now: datetime,
+    requests_per_minute: float,
+    seconds_per_request: float,
+    max_warm: int,
+    model_key: str = DEFAULT_MODEL_KEY,
+) -> int:
+    """Warm containers to request: max of schedule and rate estimate, capped at `max_warm`"""
+    desired = max(
+        scheduled_containers(schedule, now, model_key),
+        rate_containers(requests_per_minute, seconds_per_request),
+    )
+    return min(desired, max_warm)
+
+
+def local_now(timezone: str = DEFAULT_TIMEZONE) -> datetime:
+    return datetime.now(ZoneInfo(timezone))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: session snapshot, sequential sync client vs. pipelined aio client
+Runs against the local stand-in server with injected per-command latency
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from ptsl_aio_client import AsyncPTSLClient
+from ptsl_client import PTSLClient
+from ptsl_fake_server import FakePTSLServicer, serve
+
+
+def sync_snapshot(client: PTSLClient) -> dict:
+    return {
+        "transport_state": client.get_transport_state(),
+        "session_name": client.get_session_name(),
+        "track_list": client.get_track_list(),
+        "record_mode": client.get_record_mode(),
+        "sample_rate": client.get_session_sample_rate(),
+    }
+
+
+async def aio_rounds(address: str, rounds: int, max_in_flight: int) -> list:
+    async with AsyncPTSLClient(address, max_in_flight=max_in_flight) as client:
+        await client.register()
+        samples = []
+        for _ in range(rounds):
+            started_at = time.perf_counter()
+            await client.session_snapshot()
+            samples.append((time.perf_counter() - started_at) * 1000)
+        return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=50151)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    address = f"localhost:{args.port}"
+    server = serve(FakePTSLServicer(latency=args.latency_ms / 1000), port=args.port)
+    try:
+        with PTSLClient(address) as client:
+            client.register()
+            sync_samples = []
+            for _ in range(args.rounds):
+                started_at = time.perf_counter()
+                sync_snapshot(client)
+                sync_samples.append((time.perf_counter() - started_at) * 1000)
+
+        aio_samples = asyncio.run(aio_rounds(address, args.rounds, args.max_in_flight))
+    finally:
+        server.stop(0)
+
+    print(f"injected latency: {args.latency_ms:.0f} ms/command, {args.rounds} snapshots of 5 commands")
+    print(f"sync sequential:  median {statistics.median(sync_samples):7.1f} ms")
+    print(f"aio pipelined:    median {statistics.median(aio_samples):7.1f} ms (max_in_flight={args.max_in_flight})")
+
+
+if __name__ == "__main__":
+    main()
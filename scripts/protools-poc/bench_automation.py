@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk automation write/read against the local stand-in server
+N tracks x M breakpoints of main-out volume, sequential vs. concurrent
+"""
+
+import argparse
+import json
+import multiprocessing
+import time
+
+import numpy as np
+from ptsl_automation import Breakpoints, Curve, read_automation, write_automation
+from ptsl_client import VOLUME_CONTROL_ID, PTSLClient
+from ptsl_fake_server import FakePTSLServicer, FakeSession, serve
+from ptsl_pagination import iter_tracks
+
+# Allow multi-MB curves on the bench channel/server
+MESSAGE_OPTIONS = [("grpc.max_receive_message_length", 64 * 1024 * 1024),
+                   ("grpc.max_send_message_length", 64 * 1024 * 1024)]
+
+
+def run_server(port: int, tracks: int, latency: float) -> None:
+    """Stand-in server in its own process so it does not share the client's GIL"""
+    session = FakeSession.generate(tracks=tracks, clips=0, memory_locations=0)
+    server = serve(FakePTSLServicer(session, latency=latency), port=port)
+    server.wait_for_termination()
+
+
+def make_curves(track_ids: list, points: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    times = np.arange(points, dtype=np.int64) * 480  # every 10 ms at 48 kHz
+    return [
+        Curve(track_id, VOLUME_CONTROL_ID, Breakpoints(times, rng.uniform(-1.0, 1.0, points)))
+        for track_id in track_ids
+    ]
+
+
+def timed(label: str, call) -> float:
+    started_at = time.perf_counter()
+    result = call()
+    elapsed = time.perf_counter() - started_at
+    print(f"{label:34s} {elapsed * 1000:8.0f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=50152)
+    parser.add_argument("--tracks", type=int, default=100)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(
+        target=run_server, args=(args.port, args.tracks, args.latency_ms / 1000), daemon=True
+    )
+    server.start()
+    try:
+        with PTSLClient(f"localhost:{args.port}", channel_options=MESSAGE_OPTIONS) as client:
+            time.sleep(1.0)  # Let the server bind
+            client.register()
+            track_ids = [track["id"] for track in iter_tracks(client)]
+            curves = make_curves(track_ids, args.points)
+            total = args.tracks * args.points
+            print(f"{args.tracks} tracks x {args.points} breakpoints, {args.latency_ms:.0f} ms injected latency")
+            print(f"curve memory: {sum(c.breakpoints.nbytes for c in curves) / 1e6:.1f} MB as arrays")
+
+            timed("encode, arrays (to_json)", lambda: [c.breakpoints.to_json() for c in curves])
+            timed("encode, list of dicts (json.dumps)", lambda: [json.dumps([
+                {"time": {"location": str(t), "time_type": "TLType_Samples"}, "value": v}
+                for t, v in zip(c.breakpoints.times.tolist(), c.breakpoints.values.tolist())
+            ]) for c in curves])
+            for in_flight in (1, args.max_in_flight):
+                failures = timed(f"write (max_in_flight={in_flight})",
+                                 lambda: write_automation(client, curves, max_in_flight=in_flight))
+                assert not failures, failures
+                read = timed(f"read  (max_in_flight={in_flight})",
+                             lambda: read_automation(client, track_ids, max_in_flight=in_flight))
+
+            assert all(c.ok for c in read), [c.error for c in read if not c.ok][:3]
+            assert sum(len(c.breakpoints) for c in read) == total
+            assert np.array_equal(read[0].breakpoints.times, curves[0].breakpoints.times)
+            assert np.array_equal(read[0].breakpoints.values, curves[0].breakpoints.values)
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: decoding a GetTrackList response body
+Raw json.loads dicts vs. json_format.Parse vs. the ptsl_codec fast path
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from google.protobuf import json_format
+import PTSL_pb2
+from ptsl_client import CommandId
+from ptsl_codec import decode_body
+from ptsl_fake_server import FakeSession
+
+
+def measure(decode, body_json: str, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        decode(body_json)
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    session = FakeSession.generate(tracks=args.tracks, clips=0, memory_locations=0)
+    body_json = json.dumps({
+        "track_list": session.tracks,
+        "pagination_response": {"total": len(session.tracks), "limit": len(session.tracks), "offset": 0},
+    })
+
+    decoders = {
+        "raw dicts (json.loads)": json.loads,
+        "json_format.Parse": lambda text: json_format.Parse(
+            text, PTSL_pb2.GetTrackListResponseBody(), ignore_unknown_fields=True
+        ),
+        "ptsl_codec fast path": lambda text: decode_body(CommandId.GetTrackList, text),
+    }
+
+    print(f"GetTrackList response: {args.tracks} tracks, {len(body_json) / 1024:.0f} KiB")
+    for label, decode in decoders.items():
+        print(f"{label:24s} median {measure(decode, body_json, args.rounds):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
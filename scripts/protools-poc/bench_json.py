@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ptsl_json backends over recorded PTSL responses
+Decodes (and re-encodes) every response body of a PTSL log, per backend,
+plus the cost of LazyBody when nothing reads the body
+
+Without --log, a sample log is recorded from the stand-in server first:
+paginated track/clip/memory location lists, getters and PollEvents events.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import ptsl_json
+from ptsl_client import CommandId, PTSLClient
+from ptsl_events import EventStream
+from ptsl_fake_server import FakePTSLServicer, FakeSession, serve
+from ptsl_pagination import iter_clips, iter_memory_locations, iter_tracks
+from ptsl_replay import PTSLRecorder, load_calls
+
+
+def record_sample(path: str, port: int, tracks: int, clips: int, events: int) -> None:
+    session = FakeSession.generate(tracks=tracks, clips=clips, memory_locations=64)
+    server = serve(FakePTSLServicer(session, event_rate=1000), port=port)
+    try:
+        with PTSLRecorder(path) as recorder, PTSLClient(f"localhost:{port}", interceptors=[recorder]) as client:
+            for _ in range(20):
+                client.get_transport_state()
+                client.get_session_name()
+            list(iter_tracks(client, page_size=500))
+            list(iter_clips(client, page_size=1000))
+            list(iter_memory_locations(client))
+            stream = EventStream(client).start()
+            subscription = stream.subscribe(maxsize=events)
+            deadline = time.monotonic() + 30
+            while stream.events_received < events and time.monotonic() < deadline:
+                time.sleep(0.05)
+            stream.unsubscribe(subscription)
+            stream.stop()
+    finally:
+        server.stop(0)
+
+
+def measure(run, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--log", help="Recorded PTSL log (see ptsl_replay.py); recorded from the stand-in if omitted")
+    parser.add_argument("--port", type=int, default=50480)
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--clips", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args()
+
+    path = args.log
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="ptsl-bench-"), "sample.ptslrec")
+        record_sample(path, args.port, args.tracks, args.clips, args.events)
+
+    calls = load_calls(path)
+    bodies = [response.response_body_json for call in calls for _, response in call.responses]
+    bodies = [body for body in bodies if body]
+    events = sum(len(call.responses) for call in calls if call.command == CommandId.PollEvents)
+    print(f"{len(bodies)} response bodies ({events} events), {sum(map(len, bodies)) / 1024:.0f} KiB")
+
+    backends = []
+    for name in ptsl_json.BACKENDS:
+        try:
+            ptsl_json.use(name)
+        except ImportError:
+            print(f"{name:8s} not installed")
+            continue
+        parsed = [ptsl_json.loads(body) for body in bodies]
+        loads_ms = measure(lambda: [ptsl_json.loads(body) for body in bodies], args.rounds)
+        dumps_ms = measure(lambda: [ptsl_json.dumps(body) for body in parsed], args.rounds)
+        backends.append((name, loads_ms, dumps_ms))
+    lazy_ms = measure(lambda: [ptsl_json.LazyBody(body) for body in bodies], args.rounds)
+
+    baseline = {name: loads_ms + dumps_ms for name, loads_ms, dumps_ms in backends}.get("json")
+    for name, loads_ms, dumps_ms in backends:
+        speedup = f"  ({baseline / (loads_ms + dumps_ms):.1f}x json)" if baseline else ""
+        print(f"{name:8s} loads {loads_ms:7.2f} ms  dumps {dumps_ms:7.2f} ms{speedup}")
+    print(f"LazyBody, never read: {lazy_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
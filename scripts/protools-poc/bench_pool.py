@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PTSL pool throughput across several stand-in servers
+Each server runs commands one at a time (like Pro Tools), so a single host
+caps out at 1/latency commands per second
+"""
+
+import argparse
+import time
+from concurrent.futures import wait
+
+from ptsl_client import CommandId
+from ptsl_fake_server import FakePTSLServicer, serve
+from ptsl_pool import PTSLPool
+
+
+def run(addresses: list, commands: int) -> float:
+    with PTSLPool(addresses, max_workers=8 * len(addresses)) as pool:
+        pool.check_health()  # Registers every host up front
+        started_at = time.perf_counter()
+        futures = [pool.submit(CommandId.ExportMix, {"file_name": f"mix_{i}"}) for i in range(commands)]
+        wait(futures)
+        elapsed = time.perf_counter() - started_at
+        for future in futures:
+            future.result()
+        return commands / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-port", type=int, default=50180)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--commands-per-host", type=int, default=100)
+    args = parser.parse_args()
+
+    servers = [
+        serve(FakePTSLServicer(latency=args.latency_ms / 1000, serial=True), port=args.base_port + i)
+        for i in range(max(args.hosts))
+    ]
+    try:
+        print(f"{args.latency_ms:.0f} ms/command, serial hosts (ceiling {1000 / args.latency_ms:.0f} cmd/s each)")
+        baseline = None
+        for hosts in args.hosts:
+            addresses = [f"localhost:{args.base_port + i}" for i in range(hosts)]
+            throughput = run(addresses, args.commands_per_host * hosts)
+            baseline = baseline or throughput
+            print(f"{hosts} host(s): {throughput:7.1f} cmd/s  ({throughput / baseline:.2f}x)")
+    finally:
+        for server in servers:
+            server.stop(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+asyncio PTSL client (grpc.aio)
+Pipelines independent read-only commands over one channel
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from typing import Callable, List, Optional
+
+import grpc
+import ptsl_json
+import ptsl_proto
+from ptsl_client import (
+    KEEPALIVE_OPTIONS,
+    PTSL_SERVER,
+    READ_ONLY_COMMANDS,
+    CommandId,
+    PTSLError,
+    RpcTiming,
+    SessionExpiredError,
+    check_response,
+    create_request,
+)
+
+
+class CommandGate:
+    """
+    Admission control matching the PTSL command queue
+
+    Read-only commands may overlap, up to `max_in_flight`. Any other
+    command waits for in-flight reads to finish and runs alone, so Pro
+    Tools never sees a mutation interleaved with reads issued before it.
+    Waiting writers block new reads, so they cannot starve.
+    """
+
+    def __init__(self, max_in_flight: int = 8):
+        self.max_in_flight = max_in_flight
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: not self._writer and not self._writers_waiting and self._readers < self.max_in_flight
+            )
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._writers_waiting += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and self._readers == 0)
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class AsyncPTSLClient:
+    """
+    grpc.aio counterpart of PTSLClient
+
+    Same session handling (lazy register, one re-register on expiry) and
+    timing hooks; read-only commands run concurrently through CommandGate.
+    """
+
+    def __init__(
+        self,
+        address: str = PTSL_SERVER,
+        max_in_flight: int = 8,
+        company_name: str = "MUED",
+        application_name: str = "MUEDnote Hub",
+        channel_options: Optional[list] = None,
+    ):
+        self.address = address
+        self.company_name = company_name
+        self.application_name = application_name
+        self.session_id = ""
+
+        self._channel = grpc.aio.insecure_channel(address, options=KEEPALIVE_OPTIONS + (channel_options or []))
+        self._stub_instance = None
+        self._gate = CommandGate(max_in_flight)
+        self._register_lock = asyncio.Lock()
+        self._timing_hooks: List[Callable[[RpcTiming], None]] = []
+
+    @property
+    def _stub(self):
+        if self._stub_instance is None:
+            self._stub_instance = ptsl_proto.PTSLStub(self._channel)
+        return self._stub_instance
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self) -> None:
+        await self._channel.close()
+
+    def add_timing_hook(self, hook: Callable[[RpcTiming], None]) -> None:
+        """Call `hook(RpcTiming)` after every RPC"""
+        self._timing_hooks.append(hook)
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+
+    async def send_request(self, request: ptsl_proto.Request, timeout: Optional[float] = None) -> ptsl_proto.Response:
+        """Send a prepared request, timing it; no gating or status checking"""
+        started_at = time.perf_counter()
+        ok = False
+        response = None
+        try:
+            response = await self._stub.SendGrpcRequest(request, timeout=timeout)
+            ok = True
+            return response
+        finally:
+            timing = RpcTiming(
+                command=request.header.command,
+                elapsed_ms=(time.perf_counter() - started_at) * 1000,
+                ok=ok,
+                request_bytes=len(request.request_body_json),
+                response_bytes=len(response.response_body_json) if response is not None else 0,
+            )
+            for hook in self._timing_hooks:
+                hook(timing)
+
+    async def open_stream(self, command_id: int, body_json: str = "{}", timeout: Optional[float] = None):
+        """Start SendGrpcStreamingRequest in the current session; returns the call (async iterable, cancellable)"""
+        session_id = self.session_id or await self._ensure_session()
+        request = create_request(command_id, body_json, session_id)
+        return self._stub.SendGrpcStreamingRequest(request, timeout=timeout)
+
+    async def register(self) -> str:
+        """RegisterConnection (CId 70); caches and returns the session_id"""
+        body = ptsl_json.dumps({
+            "company_name": self.company_name,
+            "application_name": self.application_name,
+        })
+        async with self._gate.write():
+            response = await self.send_request(create_request(CommandId.RegisterConnection, body))
+        check_response(CommandId.RegisterConnection, response)
+        session_id = ptsl_json.loads_body(response.response_body_json).get("session_id", "")
+        if not session_id:
+            raise PTSLError(CommandId.RegisterConnection, "no session_id in response")
+        self.session_id = session_id
+        return session_id
+
+    async def _ensure_session(self, stale_session_id: str = "") -> str:
+        async with self._register_lock:
+            if not self.session_id or self.session_id == stale_session_id:
+                await self.register()
+            return self.session_id
+
+    async def send_command(
+        self,
+        command_id: int,
+        body_json: str = "{}",
+        timeout: Optional[float] = None,
+        versioned_header_json: str = "",
+    ) -> ptsl_proto.Response:
+        """Send a command in the current session, re-registering once if it expired"""
+        gate = self._gate.read if command_id in READ_ONLY_COMMANDS else self._gate.write
+        session_id = self.session_id or await self._ensure_session()
+        for attempt in range(2):
+            request = create_request(command_id, body_json, session_id, versioned_header_json)
+            async with gate():
+                response = await self.send_request(request, timeout=timeout)
+            try:
+                check_response(command_id, response)
+                return response
+            except SessionExpiredError:
+                if attempt:
+                    raise
+                session_id = await self._ensure_session(stale_session_id=session_id)
+
+    async def send(self, command_id: int, body: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        """Send a command with a JSON-serializable body and return the parsed response body"""
+        response = await self.send_command(command_id, ptsl_json.dumps_body(body), timeout=timeout)
+        return ptsl_json.loads_body(response.response_body_json)
+
+    # ------------------------------------------------------------------
+    # Typed commands
+    # ------------------------------------------------------------------
+
+    async def get_transport_state(self) -> dict:
+        """GetTransportState (CId 59)"""
+        return await self.send(CommandId.GetTransportState)
+
+    async def get_session_name(self) -> dict:
+        """GetSessionName (CId 42)"""
+        return await self.send(CommandId.GetSessionName)
+
+    async def get_session_sample_rate(self) -> dict:
+        """GetSessionSampleRate (CId 35)"""
+        return await self.send(CommandId.GetSessionSampleRate)
+
+    async def get_record_mode(self) -> dict:
+        """GetRecordMode (CId 57)"""
+        return await self.send(CommandId.GetRecordMode)
+
+    async def get_track_list(self, limit: int = 100, offset: int = 0, track_filter: str = "TLFilter_All") -> dict:
+        """GetTrackList (CId 3), one page"""
+        return await self.send(CommandId.GetTrackList, {
+            "track_filter_list": [{"filter": track_filter, "is_inverted": False}],
+            "is_filter_list_additive": True,
+            "pagination_request": {"limit": limit, "offset": offset},
+        })
+
+    async def session_snapshot(self) -> dict:
+        """Transport, name, tracks, record mode and sample rate in one concurrent round"""
+        transport, name, tracks, record_mode, sample_rate = await asyncio.gather(
+            self.get_transport_state(),
+            self.get_session_name(),
+            self.get_track_list(),
+            self.get_record_mode(),
+            self.get_session_sample_rate(),
+        )
+        return {
+            "transport_state": transport,
+            "session_name": name,
+            "track_list": tracks,
+            "record_mode": record_mode,
+            "sample_rate": sample_rate,
+        }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Bulk track automation I/O
+Reads and writes control breakpoints (GetTrackControlBreakpoints /
+SetTrackControlBreakpoints, CId 149/150) for many tracks and controls at
+once, holding each curve as NumPy (time, value) arrays
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from ptsl_client import VOLUME_CONTROL_ID, CommandId, PTSLClient
+
+SAMPLES = "TLType_Samples"
+
+# gRPC's default maximum message size is 4 MiB; keep request bodies below it
+MAX_REQUEST_BYTES = 4 * 1024 * 1024 - 64 * 1024
+
+
+class Breakpoints:
+    """
+    Automation curve as parallel arrays
+
+    times: int64 timeline locations (in `time_type` units, samples by default)
+    values: float32 control values (the proto field is a float)
+    """
+
+    __slots__ = ("times", "values", "time_type")
+
+    def __init__(self, times, values, time_type: str = "TLType_Samples"):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float32)
+        if self.times.shape != self.values.shape or self.times.ndim != 1:
+            raise ValueError("times and values must be 1-D arrays of the same length")
+        # to_json writes values as-is and JSON has no NaN/Infinity (also catches float32 overflow)
+        if not np.isfinite(self.values).all():
+            raise ValueError(f"values must be finite (first bad point: {int(np.argmin(np.isfinite(self.values)))})")
+        self.time_type = time_type
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.values.nbytes
+
+    @classmethod
+    def from_list(cls, breakpoints: List[dict]) -> "Breakpoints":
+        """
+        From the `breakpoints` list of a GetTrackControlBreakpoints response
+
+        Every point must be in samples (times are held as integers);
+        ValueError otherwise.
+        """
+        n = len(breakpoints)
+        for i, bp in enumerate(breakpoints):
+            time_type = bp.get("time", {}).get("time_type", SAMPLES)
+            if time_type != SAMPLES:
+                raise ValueError(f"breakpoint {i} is in {time_type}, not {SAMPLES}")
+        try:
+            times = np.fromiter((int(bp.get("time", {}).get("location") or 0) for bp in breakpoints), np.int64, n)
+        except ValueError as e:
+            raise ValueError(f"breakpoint location is not a sample position ({e})") from None
+        values = np.fromiter((bp.get("value", 0.0) for bp in breakpoints), np.float32, n)
+        return cls(times, values, SAMPLES)
+
+    def to_json(self, chunk_size: int = 4096) -> str:
+        """JSON array of TrackControlBreakpoint, formatted `chunk_size` points at a time"""
+        prefix = '{"time":{"location":"'
+        middle = '","time_type":"' + self.time_type + '"},"value":'
+        parts = []
+        for start in range(0, len(self), chunk_size):
+            times = self.times[start:start + chunk_size].tolist()
+            # Via float64: exact decimal of each float32, far faster than per-value formatting
+            values = self.values[start:start + chunk_size].astype(np.float64).tolist()
+            parts.append(",".join(f"{prefix}{t}{middle}{v}}}" for t, v in zip(times, values)))
+        return "[" + ",".join(p for p in parts if p) + "]"
+
+    def dedupe_flat(self) -> "Breakpoints":
+        """Drop points inside runs of equal values (the curve is unchanged)"""
+        if len(self) < 3:
+            return self
+        keep = np.ones(len(self), dtype=bool)
+        keep[1:-1] = (self.values[1:-1] != self.values[:-2]) | (self.values[1:-1] != self.values[2:])
+        return Breakpoints(self.times[keep], self.values[keep], self.time_type)
+
+
+@dataclass
+class Curve:
+    """Automation of one control on one track"""
+
+    track_id: str
+    control_id: dict
+    breakpoints: Optional[Breakpoints] = None
+    error: Optional[Exception] = None  # Why reading the curve failed (read_automation)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def read_curve(client: PTSLClient, track_id: str, control_id: Optional[dict] = None) -> Curve:
+    """GetTrackControlBreakpoints (CId 149) for one track/control"""
+    control_id = control_id or VOLUME_CONTROL_ID
+    body = client.send(CommandId.GetTrackControlBreakpoints, {"track_id": track_id, "control_id": control_id})
+    try:
+        breakpoints = Breakpoints.from_list(body.get("breakpoints", []))
+    except ValueError as e:
+        raise ValueError(f"Curve for track {track_id} ({control_id.get('control_type', control_id)}): {e}") from None
+    return Curve(track_id, control_id, breakpoints)
+
+
+def write_curve(client: PTSLClient, curve: Curve, chunk_size: int = 4096) -> int:
+    """
+    SetTrackControlBreakpoints (CId 150) for one curve; returns request bytes
+
+    Pro Tools replaces the control's whole curve on every call (and needs a
+    point at time 0), so a curve cannot be split over several requests;
+    `chunk_size` only bounds the formatting work per step.
+    """
+    breakpoints = curve.breakpoints
+    if breakpoints is None or not len(breakpoints):
+        raise ValueError(f"Curve for track {curve.track_id} has no breakpoints")
+    header = json.dumps({"track_id": curve.track_id, "control_id": curve.control_id})
+    body_json = header[:-1] + ',"breakpoints":' + breakpoints.to_json(chunk_size) + "}"
+    if len(body_json) > MAX_REQUEST_BYTES:
+        raise ValueError(
+            f"Curve for track {curve.track_id} is {len(body_json)} bytes ({len(breakpoints)} points); "
+            f"over the {MAX_REQUEST_BYTES} byte request limit (try Breakpoints.dedupe_flat())"
+        )
+    client.send_command(CommandId.SetTrackControlBreakpoints, body_json)
+    return len(body_json)
+
+
+def read_automation(
+    client: PTSLClient,
+    track_ids: Iterable[str],
+    control_ids: Iterable[dict] = (VOLUME_CONTROL_ID,),
+    max_in_flight: int = 8,
+) -> List[Curve]:
+    """
+    Read every (track, control) curve, up to `max_in_flight` requests at a time
+
+    One failing curve does not stop the others: it comes back without
+    breakpoints and with the exception in `error` (see `Curve.ok`).
+    """
+    control_ids = list(control_ids)
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ptsl-automation") as executor:
+        futures = {
+            executor.submit(read_curve, client, track_id, control_id): (track_id, control_id)
+            for track_id in track_ids
+            for control_id in control_ids
+        }
+        curves = []
+        for future, (track_id, control_id) in futures.items():
+            error = future.exception()
+            curves.append(future.result() if error is None else Curve(track_id, control_id, error=error))
+        return curves
+
+
+def write_automation(
+    client: PTSLClient,
+    curves: Iterable[Curve],
+    max_in_flight: int = 8,
+    chunk_size: int = 4096,
+) -> Dict[int, Exception]:
+    """
+    Upload curves concurrently, up to `max_in_flight` requests at a time
+
+    One failing curve does not stop the others; returns {index in `curves`:
+    exception} for the ones that failed.
+    """
+    failures: Dict[int, Exception] = {}
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ptsl-automation") as executor:
+        futures = {
+            executor.submit(write_curve, client, curve, chunk_size): index
+            for index, curve in enumerate(curves)
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                failures[futures[future]] = error
+    return failures
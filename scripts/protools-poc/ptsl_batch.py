@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+PTSL batch jobs
+Groups many commands into one Pro Tools batch job (CreateBatchJob /
+CompleteBatchJob / CancelBatchJob, CId 129/137/138) so a large edit shows
+up as a single operation instead of hundreds
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Union
+
+import ptsl_json
+from ptsl_client import CommandId, PTSLClient, PTSLError
+
+
+class BatchJobError(PTSLError):
+    """Commands inside a batch job failed and the job was canceled"""
+
+    def __init__(self, job_id: str, failures: List[Exception]):
+        super().__init__(CommandId.CancelBatchJob, f"batch job {job_id}: {len(failures)} command(s) failed")
+        self.job_id = job_id
+        self.failures = failures
+
+
+class BatchJob:
+    """
+    Context manager for one batch job
+
+        with BatchJob(client, "Import stems", expected=len(stems)) as job:
+            for stem in stems:
+                job.submit(CommandId.Import, body_for(stem))
+
+    Every command sent through the job carries `batch_job_header` (job id
+    and current progress) in versioned_request_header_json. `submit` runs
+    commands on up to `max_in_flight` threads; `send` runs one inline.
+
+    On exit the job waits for submitted commands, then completes it. If the
+    block raised, commands not yet started are skipped. If a command failed
+    (or the block raised) and `cancel_on_failure` is set, commands not yet
+    started are skipped, the job is canceled and BatchJobError is raised
+    (the block's own exception propagates instead, if it raised); otherwise
+    the job is completed and the errors are left in `failures`.
+
+    `expected` (number of commands) makes the reported progress meaningful;
+    without it progress is relative to the commands submitted so far.
+    """
+
+    def __init__(
+        self,
+        client: PTSLClient,
+        name: str,
+        description: str = "",
+        timeout_ms: int = 0,
+        cancel_on_failure: bool = True,
+        is_cancelable: bool = True,
+        max_in_flight: int = 4,
+        expected: Optional[int] = None,
+    ):
+        self.client = client
+        self.name = name
+        self.description = description
+        self.timeout_ms = timeout_ms
+        self.cancel_on_failure = cancel_on_failure
+        self.is_cancelable = is_cancelable
+        self.max_in_flight = max_in_flight
+        self.expected = expected
+        self.id = ""
+        self.submitted = 0
+        self.completed = 0
+        self.skipped = 0
+        self.failures: List[Exception] = []
+        self.canceled = False
+
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._aborted = False  # Set when the block raised: queued commands are skipped
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def __enter__(self) -> "BatchJob":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._aborted = True
+        self._drain()
+        if self.cancel_on_failure and (exc_type is not None or self.failures):
+            self.cancel()
+            if exc_type is None:
+                raise BatchJobError(self.id, self.failures)
+            return False
+        self.complete()
+        return False
+
+    def start(self) -> "BatchJob":
+        """CreateBatchJob (CId 129)"""
+        job = {
+            "name": self.name,
+            "description": self.description,
+            "timeout": self.timeout_ms,
+            "is_cancelable": self.is_cancelable,
+            "cancel_on_failure": self.cancel_on_failure,
+        }
+        body = self.client.send(CommandId.CreateBatchJob, {"job": job})
+        self.id = body.get("id", "")
+        if not self.id:
+            raise PTSLError(CommandId.CreateBatchJob, "no job id in response")
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="ptsl-batch")
+        print(f"[PTSL] Batch job '{self.name}' started: {self.id}")
+        return self
+
+    def complete(self) -> None:
+        """CompleteBatchJob (CId 137)"""
+        self.client.send(CommandId.CompleteBatchJob, {"id": self.id})
+        print(f"[PTSL] Batch job '{self.name}' completed: {self.completed} commands, {len(self.failures)} failed")
+
+    def cancel(self) -> None:
+        """CancelBatchJob (CId 138)"""
+        self.canceled = True
+        self.client.send(CommandId.CancelBatchJob, {"id": self.id})
+        print(f"[PTSL] Batch job '{self.name}' canceled after {self.completed} commands")
+
+    def status(self) -> dict:
+        """GetBatchJobStatus (CId 133) job_info"""
+        return self.client.send(CommandId.GetBatchJobStatus, {"id": self.id}).get("job_info", {})
+
+    def _drain(self) -> None:
+        if self._executor is None:
+            return
+        wait(self._futures)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    @property
+    def progress(self) -> int:
+        """Percent of commands completed (0-100)"""
+        total = self.expected or self.submitted
+        return min(100, int(100 * self.completed / total)) if total else 0
+
+    def header_json(self) -> str:
+        """versioned_request_header_json for the next command"""
+        return ptsl_json.dumps({"batch_job_header": {"id": self.id, "progress": self.progress}})
+
+    def send(self, command_id: int, body: Union[dict, str, None] = None, timeout: Optional[float] = None) -> dict:
+        """Run one command inside the job now; returns the parsed response body"""
+        if self._aborted or (self.failures and self.cancel_on_failure):
+            with self._lock:
+                self.skipped += 1
+            raise PTSLError(command_id, f"skipped, batch job {self.id} is ending early")
+        body_json = body if isinstance(body, str) else ptsl_json.dumps(body or {})
+        try:
+            response = self.client.send_command(
+                command_id, body_json, timeout=timeout, versioned_header_json=self.header_json()
+            )
+        except Exception as e:
+            with self._lock:
+                self.failures.append(e)
+            raise
+        with self._lock:
+            self.completed += 1
+        return ptsl_json.loads_body(response.response_body_json)
+
+    def submit(self, command_id: int, body: Union[dict, str, None] = None, timeout: Optional[float] = None) -> Future:
+        """Queue a command; returns a Future of the parsed response body"""
+        if self._executor is None:
+            raise RuntimeError("Batch job is not running")
+        with self._lock:
+            self.submitted += 1
+        future = self._executor.submit(self.send, command_id, body, timeout)
+        self._futures.append(future)
+        return future
+
+    def results(self) -> Dict[int, Union[dict, Exception]]:
+        """Index -> response body (or exception) for every submitted command so far"""
+        return {
+            index: future.exception() or future.result()
+            for index, future in enumerate(self._futures)
+            if future.done()
+        }
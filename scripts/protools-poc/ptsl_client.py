@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Pro Tools Scripting Library (PTSL) client
+Long-lived gRPC connection to Pro Tools with session handling and typed commands
+"""
+
+from __future__ import annotations
+
+import enum
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import grpc
+import ptsl_json
+import ptsl_proto
+
+PTSL_SERVER = "localhost:31416"
+
+# PTSL Client API version sent in every request header
+PTSL_VERSION = 2025  # Year
+PTSL_VERSION_MINOR = 10  # Month
+
+# Channel keepalive so idle hub connections survive NAT/firewall timeouts
+KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+class CommandId(enum.IntEnum):
+    """PTSL CommandId values used by the hub (see PTSL.proto)"""
+
+    Import = 2
+    GetTrackList = 3
+    GetTaskStatus = 12
+    ExportMix = 28
+    GetSessionSampleRate = 35
+    GetSessionName = 42
+    GetRecordMode = 57
+    GetTransportState = 59
+    GetMemoryLocations = 69
+    RegisterConnection = 70
+    GetMainCounterFormat = 102
+    GetTimeAsType = 118
+    GetClipList = 125
+    CreateBatchJob = 129
+    SubscribeToEvents = 132
+    GetBatchJobStatus = 133
+    PollEvents = 135
+    UnsubscribeFromEvents = 136
+    CompleteBatchJob = 137
+    CancelBatchJob = 138
+    GetTrackControlInfo = 148
+    GetTrackControlBreakpoints = 149
+    SetTrackControlBreakpoints = 150
+    GetPlaylistElements = 158
+
+
+# Getters with no side effects: safe to pipeline, retry and share
+READ_ONLY_COMMANDS = frozenset({
+    CommandId.GetTrackList,
+    CommandId.GetTaskStatus,
+    CommandId.GetSessionSampleRate,
+    CommandId.GetSessionName,
+    CommandId.GetRecordMode,
+    CommandId.GetTransportState,
+    CommandId.GetMemoryLocations,
+    CommandId.GetMainCounterFormat,
+    CommandId.GetTimeAsType,
+    CommandId.GetClipList,
+    CommandId.GetBatchJobStatus,
+    CommandId.GetTrackControlInfo,
+    CommandId.GetTrackControlBreakpoints,
+    CommandId.GetPlaylistElements,
+})
+
+# TaskStatus values (see PTSL.proto)
+TASK_STATUS_FAILED = 4  # TStatus_Failed; literal so importing this module does not load PTSL_pb2
+
+# Command error types meaning the session_id is no longer valid
+SESSION_ERROR_TYPES = {"SDK_SessionIdParseError", "CEType_SDK_SessionIdParseError", 403}
+
+# Default track control: main output volume
+VOLUME_CONTROL_ID = {"section": "TSId_MainOut", "control_type": "TCType_Volume"}
+
+
+class PTSLError(Exception):
+    """Command returned a failed status or a (non-warning) command error"""
+
+    def __init__(self, command: int, message: str, errors: Optional[list] = None, status: int = 0):
+        super().__init__(f"{_command_name(command)}: {message}")
+        self.command = command
+        self.errors = errors or []
+        self.status = status
+
+
+class SessionExpiredError(PTSLError):
+    """Pro Tools no longer accepts our session_id"""
+
+
+@dataclass
+class RpcTiming:
+    """Timing information passed to timing hooks after every RPC"""
+
+    command: int
+    elapsed_ms: float
+    ok: bool
+    request_bytes: int
+    response_bytes: int
+
+
+class SingleFlight:
+    """
+    Run concurrent calls with the same key once
+
+    The first caller of `do(key, fn)` runs `fn`; callers arriving with the
+    same key while it runs wait for it and get the same result (or
+    exception), however long that takes. Nothing is cached once the call
+    has finished.
+    """
+
+    def __init__(self):
+        self._flights: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.calls: Dict[int, int] = defaultdict(int)  # Command -> calls through `do`
+        self.coalesced: Dict[int, int] = defaultdict(int)  # Command -> calls that joined another's flight
+
+    def do(self, key: tuple, fn: Callable):
+        command = key[0]
+        with self._lock:
+            self.calls[command] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+            else:
+                self.coalesced[command] += 1
+        if not leader:
+            return flight.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per command: calls, coalesced (joined an in-flight call) and rpcs (calls actually sent)"""
+        with self._lock:
+            return {
+                _command_name(command): {
+                    "calls": calls,
+                    "coalesced": self.coalesced[command],
+                    "rpcs": calls - self.coalesced[command],
+                }
+                for command, calls in sorted(self.calls.items())
+            }
+
+
+def _command_name(command: int) -> str:
+    try:
+        return CommandId(command).name
+    except ValueError:
+        return f"CId_{command}"
+
+
+def create_request(
+    command_id: int,
+    body_json: str = "{}",
+    session_id: str = "",
+    versioned_header_json: str = "",
+) -> ptsl_proto.Request:
+    """Create a PTSL request"""
+    request = ptsl_proto.Request()
+    request.header.command = command_id
+    request.header.version = PTSL_VERSION
+    request.header.version_minor = PTSL_VERSION_MINOR
+    if session_id:
+        request.header.session_id = session_id
+    if versioned_header_json:
+        request.header.versioned_request_header_json = versioned_header_json
+    request.request_body_json = body_json
+    return request
+
+
+def parse_errors(response_error_json: str) -> list:
+    """Parse `response_error_json` into a list of CommandError dicts"""
+    if not response_error_json:
+        return []
+    try:
+        parsed = ptsl_json.loads(response_error_json)
+    except ValueError:
+        return [{"command_error_message": response_error_json}]
+    if isinstance(parsed, list):
+        return parsed
+    if isinstance(parsed, dict):
+        return parsed.get("errors", [parsed])
+    return [{"command_error_message": str(parsed)}]
+
+
+def check_response(command: int, response: ptsl_proto.Response) -> None:
+    """Raise PTSLError/SessionExpiredError for failed responses; warnings pass"""
+    errors = parse_errors(response.response_error_json)
+    if any(e.get("command_error_type") in SESSION_ERROR_TYPES for e in errors):
+        raise SessionExpiredError(command, "session expired", errors, response.header.status)
+
+    fatal = [e for e in errors if not e.get("is_warning")]
+    if fatal or response.header.status == TASK_STATUS_FAILED:
+        message = "; ".join(e.get("command_error_message", "") for e in fatal) or "command failed"
+        raise PTSLError(command, message, errors, response.header.status)
+
+
+class PTSLClient:
+    """
+    PTSL client owning one long-lived channel
+
+    Registers on first use, caches the session_id and re-registers once
+    when Pro Tools reports the session as expired. Every RPC is timed and
+    reported to the registered timing hooks.
+
+    With `coalesce` (the default), concurrent identical read-only commands
+    (same command, body, header and session) share one in-flight RPC and
+    its Response; see `coalescing_stats`. A read never joins a call
+    started before a write was sent from this client, so callers still
+    see their own writes. Each caller decodes its own body dict. A caller
+    that joins an in-flight call gets that call's outcome under the first
+    caller's timeout: its own `timeout` is ignored, so it may wait longer
+    or fail sooner (DEADLINE_EXCEEDED) than it asked for.
+    """
+
+    def __init__(
+        self,
+        address: str = PTSL_SERVER,
+        company_name: str = "MUED",
+        application_name: str = "MUEDnote Hub",
+        channel_options: Optional[list] = None,
+        interceptors: Optional[list] = None,
+        coalesce: bool = True,
+    ):
+        self.address = address
+        self.company_name = company_name
+        self.application_name = application_name
+        self.session_id = ""
+
+        self._channel = grpc.insecure_channel(address, options=KEEPALIVE_OPTIONS + (channel_options or []))
+        if interceptors:
+            self._channel = grpc.intercept_channel(self._channel, *interceptors)
+        self._stub_instance = None
+        self._register_lock = threading.Lock()
+        self._timing_hooks: List[Callable[[RpcTiming], None]] = []
+        self._flights = SingleFlight() if coalesce else None
+        self._writes = 0  # Non-read-only commands sent; part of the coalescing key
+        self._writes_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._channel.close()
+
+    @property
+    def _stub(self):
+        # Created on first RPC so the generated modules load only when needed
+        if self._stub_instance is None:
+            self._stub_instance = ptsl_proto.PTSLStub(self._channel)
+        return self._stub_instance
+
+    def add_timing_hook(self, hook: Callable[[RpcTiming], None]) -> None:
+        """Call `hook(RpcTiming)` after every RPC"""
+        self._timing_hooks.append(hook)
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+
+    def send_request(self, request: ptsl_proto.Request, timeout: Optional[float] = None) -> ptsl_proto.Response:
+        """Send a prepared request, timing it; no status checking"""
+        started_at = time.perf_counter()
+        ok = False
+        response = None
+        try:
+            response = self._stub.SendGrpcRequest(request, timeout=timeout)
+            ok = True
+            return response
+        finally:
+            timing = RpcTiming(
+                command=request.header.command,
+                elapsed_ms=(time.perf_counter() - started_at) * 1000,
+                ok=ok,
+                request_bytes=len(request.request_body_json),
+                response_bytes=len(response.response_body_json) if response is not None else 0,
+            )
+            for hook in self._timing_hooks:
+                hook(timing)
+
+    def open_stream(self, command_id: int, body_json: str = "{}", timeout: Optional[float] = None):
+        """Start SendGrpcStreamingRequest in the current session; returns the gRPC call (iterable, cancellable)"""
+        session_id = self.session_id or self._ensure_session()
+        request = create_request(command_id, body_json, session_id)
+        return self._stub.SendGrpcStreamingRequest(request, timeout=timeout)
+
+    def register(self, timeout: Optional[float] = None) -> str:
+        """RegisterConnection (CId 70); caches and returns the session_id"""
+        body = ptsl_json.dumps({
+            "company_name": self.company_name,
+            "application_name": self.application_name,
+        })
+        response = self.send_request(create_request(CommandId.RegisterConnection, body), timeout=timeout)
+        check_response(CommandId.RegisterConnection, response)
+        session_id = ptsl_json.loads_body(response.response_body_json).get("session_id", "")
+        if not session_id:
+            raise PTSLError(CommandId.RegisterConnection, "no session_id in response")
+        self.session_id = session_id
+        return session_id
+
+    def _ensure_session(self, stale_session_id: str = "", timeout: Optional[float] = None) -> str:
+        with self._register_lock:
+            # Another thread may already have re-registered
+            if not self.session_id or self.session_id == stale_session_id:
+                self.register(timeout)
+            return self.session_id
+
+    def send(
+        self,
+        command_id: int,
+        body: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        versioned_header_json: str = "",
+        lazy: bool = False,
+    ) -> dict:
+        """
+        Send a command with a JSON-serializable body and return the parsed response body
+
+        With `lazy`, returns a LazyBody that parses on first access.
+        """
+        body_json = ptsl_json.dumps_body(body)
+        response = self.send_command(command_id, body_json, timeout=timeout, versioned_header_json=versioned_header_json)
+        if lazy:
+            return ptsl_json.LazyBody(response.response_body_json)
+        return ptsl_json.loads_body(response.response_body_json)
+
+    def send_command(
+        self,
+        command_id: int,
+        body_json: str = "{}",
+        timeout: Optional[float] = None,
+        versioned_header_json: str = "",
+    ) -> ptsl_proto.Response:
+        """Send a command in the current session, re-registering once if it expired"""
+        if command_id not in READ_ONLY_COMMANDS:
+            with self._writes_lock:
+                self._writes += 1
+        elif self._flights is not None:
+            key = (command_id, body_json, versioned_header_json, self.session_id, self._writes)
+            return self._flights.do(
+                key, lambda: self._send_in_session(command_id, body_json, timeout, versioned_header_json)
+            )
+        return self._send_in_session(command_id, body_json, timeout, versioned_header_json)
+
+    def _send_in_session(
+        self,
+        command_id: int,
+        body_json: str,
+        timeout: Optional[float],
+        versioned_header_json: str,
+    ) -> ptsl_proto.Response:
+        # An implicit registration runs under the command's timeout
+        session_id = self.session_id or self._ensure_session(timeout=timeout)
+        for attempt in range(2):
+            request = create_request(command_id, body_json, session_id, versioned_header_json)
+            response = self.send_request(request, timeout=timeout)
+            try:
+                check_response(command_id, response)
+                return response
+            except SessionExpiredError:
+                if attempt:
+                    raise
+                session_id = self._ensure_session(stale_session_id=session_id, timeout=timeout)
+
+    def coalescing_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per read-only command: calls, coalesced and rpcs (empty with coalescing off)"""
+        return self._flights.stats() if self._flights is not None else {}
+
+    # ------------------------------------------------------------------
+    # Typed commands
+    # ------------------------------------------------------------------
+
+    def get_transport_state(self) -> dict:
+        """GetTransportState (CId 59)"""
+        return self.send(CommandId.GetTransportState)
+
+    def get_session_name(self) -> dict:
+        """GetSessionName (CId 42)"""
+        return self.send(CommandId.GetSessionName)
+
+    def get_session_sample_rate(self) -> dict:
+        """GetSessionSampleRate (CId 35)"""
+        return self.send(CommandId.GetSessionSampleRate)
+
+    def get_record_mode(self) -> dict:
+        """GetRecordMode (CId 57)"""
+        return self.send(CommandId.GetRecordMode)
+
+    def get_track_list(self, limit: int = 100, offset: int = 0, track_filter: str = "TLFilter_All") -> dict:
+        """GetTrackList (CId 3), one page"""
+        return self.send(CommandId.GetTrackList, {
+            "track_filter_list": [{"filter": track_filter, "is_inverted": False}],
+            "is_filter_list_additive": True,
+            "pagination_request": {"limit": limit, "offset": offset},
+        })
+
+    def get_track_control_info(self, track_names: List[str], control_id: Optional[dict] = None) -> dict:
+        """GetTrackControlInfo (CId 148)"""
+        return self.send(CommandId.GetTrackControlInfo, {
+            "track_names": track_names,
+            "control_id": control_id or VOLUME_CONTROL_ID,
+        })
+
+    def get_track_control_breakpoints(self, track_name: str, control_id: Optional[dict] = None) -> dict:
+        """GetTrackControlBreakpoints (CId 149)"""
+        return self.send(CommandId.GetTrackControlBreakpoints, {
+            "track_name": track_name,
+            "control_id": control_id or VOLUME_CONTROL_ID,
+        })
+
+    def subscribe_to_events(self, events: List[dict]) -> dict:
+        """SubscribeToEvents (CId 132); events are {event_id, event_data_json} dicts"""
+        return self.send(CommandId.SubscribeToEvents, {"events": events})
+
+    def unsubscribe_from_events(self, events: List[dict]) -> dict:
+        """UnsubscribeFromEvents (CId 136)"""
+        return self.send(CommandId.UnsubscribeFromEvents, {"events": events})
+
+    def get_task_status(self, task_id: str) -> dict:
+        """GetTaskStatus (CId 12)"""
+        return self.send(CommandId.GetTaskStatus, {"task_id": task_id})
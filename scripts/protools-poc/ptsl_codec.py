@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Typed PTSL request/response bodies
+Maps each CommandId to its <Name>RequestBody / <Name>ResponseBody messages
+in PTSL_pb2 and converts between them and the JSON carried in
+request_body_json / response_body_json
+"""
+
+from functools import cached_property
+from typing import Dict, Optional, Type, Union
+
+from google.protobuf import json_format
+from google.protobuf.message import Message
+import PTSL_pb2
+import ptsl_json
+from ptsl_client import PTSLClient
+
+_MESSAGES = PTSL_pb2.DESCRIPTOR.message_types_by_name
+
+
+def _message_class(name: str) -> Optional[Type[Message]]:
+    return getattr(PTSL_pb2, name) if name in _MESSAGES else None
+
+
+def _command_names() -> Dict[int, str]:
+    """Every CommandId in PTSL.proto: number -> name without the CId_ prefix (aliases share a number)"""
+    names = {}
+    for value in PTSL_pb2.DESCRIPTOR.enum_types_by_name["CommandId"].values:
+        names.setdefault(value.number, value.name[4:] if value.name.startswith("CId_") else value.name)
+    return names
+
+
+# CommandId -> (request body type, response body type) for every command in
+# PTSL.proto, not just the hub's CommandId subset; None where the command
+# has no body in that direction
+MESSAGE_TYPES = {
+    command: (_message_class(f"{name}RequestBody"), _message_class(f"{name}ResponseBody"))
+    for command, name in _command_names().items()
+}
+
+
+def request_type(command_id: int) -> Optional[Type[Message]]:
+    return MESSAGE_TYPES.get(command_id, (None, None))[0]
+
+
+def response_type(command_id: int) -> Optional[Type[Message]]:
+    return MESSAGE_TYPES.get(command_id, (None, None))[1]
+
+
+def encode_body(body: Union[Message, dict, None]) -> str:
+    """request_body_json for a typed message (or a plain dict)"""
+    if body is None:
+        return "{}"
+    if isinstance(body, Message):
+        # PTSL expects proto field names (snake_case), not lowerCamelCase
+        return json_format.MessageToJson(body, preserving_proto_field_name=True, indent=None)
+    return ptsl_json.dumps(body)
+
+
+def dict_to_message(data: dict, message_class: Type[Message]) -> Message:
+    """
+    Build `message_class` from a decoded JSON dict
+
+    Fast path: the message constructor takes nested dicts, lists and enum
+    names directly (C-implemented with the upb backend). It rejects what
+    only the JSON mapping allows (int64 as strings, unknown fields, ...),
+    in which case json_format does the conversion.
+    """
+    try:
+        return message_class(**data)
+    except (ValueError, TypeError):
+        return json_format.ParseDict(data, message_class(), ignore_unknown_fields=True)
+
+
+def decode_body(command_id: int, body_json: str) -> Optional[Message]:
+    """Typed response body; None if the command has no response message"""
+    message_class = response_type(command_id)
+    if message_class is None:
+        return None
+    return dict_to_message(ptsl_json.loads_body(body_json), message_class)
+
+
+class TypedResponse:
+    """
+    Response wrapper that decodes its body at most once
+
+    `body` is the plain dict, `message` the typed response body; both are
+    parsed on first access and cached on the instance.
+    """
+
+    def __init__(self, command_id: int, response: PTSL_pb2.Response):
+        self.command_id = command_id
+        self.response = response
+
+    @property
+    def task_id(self) -> str:
+        return self.response.header.task_id
+
+    @cached_property
+    def body(self) -> dict:
+        return ptsl_json.loads_body(self.response.response_body_json)
+
+    @cached_property
+    def message(self) -> Optional[Message]:
+        message_class = response_type(self.command_id)
+        if message_class is None:
+            return None
+        return dict_to_message(self.body, message_class)
+
+
+def send_typed(
+    client: PTSLClient,
+    command_id: int,
+    body: Union[Message, dict, None] = None,
+    timeout: Optional[float] = None,
+) -> TypedResponse:
+    """Send a command with a typed (or dict) body; returns the lazily decoded response"""
+    response = client.send_command(command_id, encode_body(body), timeout=timeout)
+    return TypedResponse(command_id, response)
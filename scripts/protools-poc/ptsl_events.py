@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+PTSL event stream consumer
+Holds the single PollEvents (CId 135) stream of a session in a background
+thread, decodes each event once and fans it out to in-process subscribers
+"""
+
+import collections
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+import grpc
+import ptsl_json
+from ptsl_client import CommandId, PTSLClient, SessionExpiredError, check_response
+
+# Queue overflow policies
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+COALESCE = "coalesce"
+
+
+@dataclass
+class Event:
+    """Decoded PollEvents event"""
+
+    event_id: str
+    data: dict
+    received_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def key(self) -> tuple:
+        """Identity used for coalescing: same event on the same track"""
+        return self.event_id, self.data.get("track_id", "")
+
+
+def decode_event(response_body_json: str) -> Optional[Event]:
+    """Decode a PollEvents response body; None if it carries no event"""
+    body = ptsl_json.loads_body(response_body_json)
+    event = body.get("event")
+    if not event:
+        return None
+    data_json = event.get("event_data_json") or "{}"
+    return Event(event_id=event.get("event_id", "EId_Unknown"), data=ptsl_json.loads(data_json))
+
+
+class Subscription:
+    """
+    Bounded event queue for one consumer
+
+    - drop_oldest: when full, discard the oldest queued event
+    - drop_newest: when full, discard the new event
+    - coalesce: a new event replaces a queued event with the same key
+      (event, track) in place, so consumers only see the latest state;
+      when full with no match, discard the oldest
+    """
+
+    def __init__(
+        self,
+        event_ids: Optional[Iterable[str]] = None,
+        predicate: Optional[Callable[[Event], bool]] = None,
+        maxsize: int = 1024,
+        policy: str = DROP_OLDEST,
+    ):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, COALESCE):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.event_ids = set(event_ids) if event_ids else None
+        self.predicate = predicate
+        self.maxsize = maxsize
+        self.policy = policy
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+
+        # Insertion-ordered; keyed by Event.key for coalesce, by sequence otherwise
+        self._queue: collections.OrderedDict = collections.OrderedDict()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def wants(self, event: Event) -> bool:
+        if self.event_ids is not None and event.event_id not in self.event_ids:
+            return False
+        return self.predicate is None or self.predicate(event)
+
+    def put(self, event: Event) -> None:
+        with self._condition:
+            if self.closed:
+                return
+            key = event.key if self.policy == COALESCE else next(self._sequence)
+            if key in self._queue:
+                self._queue[key] = event
+                self.coalesced += 1
+                return
+            if len(self._queue) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                self._queue.popitem(last=False)
+                self.dropped += 1
+            self._queue[key] = event
+            self.delivered += 1
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, or None on timeout / after close"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._queue or self.closed, timeout):
+                return None
+            return self._queue.popitem(last=False)[1] if self._queue else None
+
+    def close(self) -> None:
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+class EventStream:
+    """
+    Background consumer of the session's single PollEvents stream
+
+    Reconnects with jittered exponential backoff when the stream fails and
+    calls the reconnect hooks after every (re)connect, e.g. to re-apply
+    event subscriptions.
+    """
+
+    def __init__(
+        self,
+        client: PTSLClient,
+        backoff_initial: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self.client = client
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.events_received = 0
+        self.reconnects = 0
+
+        self._subscriptions: List[Subscription] = []
+        self._subscriptions_lock = threading.Lock()
+        self._reconnect_hooks: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._call = None
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, event_ids: Optional[Iterable[str]] = None, **kwargs) -> Subscription:
+        """Create a subscriber queue (see Subscription for options)"""
+        subscription = Subscription(event_ids, **kwargs)
+        with self._subscriptions_lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        with self._subscriptions_lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def add_reconnect_hook(self, hook: Callable[[], None]) -> None:
+        """Call `hook()` after the stream (re)connects"""
+        self._reconnect_hooks.append(hook)
+
+    def start(self) -> "EventStream":
+        self._thread = threading.Thread(target=self._run, name="ptsl-events", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        call = self._call
+        if call is not None:
+            call.cancel()
+        if self._thread:
+            self._thread.join(timeout)
+        for subscription in self._subscriptions:
+            subscription.close()
+
+    def dispatch(self, event: Event) -> None:
+        """Fan one decoded event out to every interested subscriber"""
+        self.events_received += 1
+        for subscription in self._subscriptions:
+            if subscription.wants(event):
+                subscription.put(event)
+
+    def _run(self) -> None:
+        backoff = self.backoff_initial
+        first = True
+        while not self._stop.is_set():
+            try:
+                self._call = self.client.open_stream(CommandId.PollEvents)
+                if not first:
+                    self.reconnects += 1
+                first = False
+                for hook in self._reconnect_hooks:
+                    hook()
+                for response in self._call:
+                    check_response(CommandId.PollEvents, response)
+                    event = decode_event(response.response_body_json)
+                    if event is not None:
+                        self.dispatch(event)
+                    backoff = self.backoff_initial
+            except SessionExpiredError:
+                # Forces open_stream to re-register on the next attempt
+                self.client.session_id = ""
+            except grpc.RpcError as e:
+                if self._stop.is_set():
+                    return
+                print(f"[PTSL] Event stream failed: {e.code()}, reconnecting in {backoff:.1f}s")
+            except Exception as e:
+                print(f"[PTSL] Event stream error: {type(e).__name__}: {e}")
+            finally:
+                self._call = None
+
+            if self._stop.wait(backoff * random.uniform(0.5, 1.0)):
+                return
+            backoff = min(self.backoff_max, backoff * 2)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Local PTSL stand-in server
+Implements PTSLServicer on top of a scriptable fake session (tracks, clips,
+memory locations), with per-command latency, pagination and a synthetic
+PollEvents stream, so PTSL clients can be tested and load-tested without a
+running Pro Tools
+
+Usage:
+    python ptsl_fake_server.py --tracks 1000 --clips 20000 --latency-ms 5 --event-rate 50
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent import futures
+from typing import Dict, Iterator, List, Optional
+
+import grpc
+import PTSL_pb2
+import PTSL_pb2_grpc
+from ptsl_client import CommandId
+
+# Track state events and the TrackAttributes flag each one toggles
+TRACK_STATE_EVENTS = {
+    "EId_TrackMuteStateChanged": "is_muted",
+    "EId_TrackSoloStateChanged": "is_soloed",
+    "EId_TrackRecordEnabledStateChanged": "is_record_enabled",
+}
+
+
+class FakeSession:
+    """Mutable Pro Tools session state served by FakePTSLServicer"""
+
+    def __init__(self, name: str = "Fake Session"):
+        self.name = name
+        self.sample_rate = "SR_48000"
+        self.transport_state = "TS_TransportStopped"
+        self.record_mode = "RM_Normal"
+        self.main_counter = "TLType_Samples"  # Format of memory location start/end times
+        self.tracks: List[dict] = []
+        self.clips: List[dict] = []
+        self.memory_locations: List[dict] = []
+        self.automation: Dict[tuple, list] = {}  # (track_id, control_id JSON) -> breakpoints
+        self.lock = threading.Lock()
+
+    @classmethod
+    def generate(cls, tracks: int = 64, clips: int = 256, memory_locations: int = 32, seed: int = 0) -> "FakeSession":
+        """Session with synthetic tracks, clips and memory locations"""
+        rng = random.Random(seed)
+        session = cls()
+        for i in range(tracks):
+            session.add_track(f"{rng.choice(['Audio', 'MIDI', 'Inst', 'Aux'])} {i + 1}")
+        for i in range(clips):
+            session.clips.append({
+                "file_id": f"{rng.getrandbits(128):032x}",
+                "clip_id": f"{rng.getrandbits(128):032x}",
+                "clip_full_name": f"Clip_{i + 1:05d}",
+                "clip_root_name": f"Clip_{i + 1:05d}",
+                "clip_type": "CType_Audio",
+            })
+        for i in range(memory_locations):
+            start = i * 48000 * 4
+            session.memory_locations.append({
+                "number": i + 1,
+                "name": f"Marker {i + 1}",
+                "start_time": str(start),
+                "end_time": str(start),
+            })
+        return session
+
+    def add_track(self, name: str, track_type: Optional[str] = None) -> dict:
+        track = {
+            "name": name,
+            "type": track_type or ("TT_Midi" if name.startswith(("MIDI", "Inst")) else "TT_Audio"),
+            "id": uuid.uuid4().hex,
+            "index": len(self.tracks) + 1,
+            "track_attributes": {attr: False for attr in TRACK_STATE_EVENTS.values()},
+        }
+        self.tracks.append(track)
+        return track
+
+    def find_track(self, track_id: str = "", track_name: str = "") -> Optional[dict]:
+        for track in self.tracks:
+            if (track_id and track["id"] == track_id) or (track_name and track["name"] == track_name):
+                return track
+        return None
+
+
+def _page(items: list, body: dict, max_page_size: int) -> tuple:
+    """Slice `items` per pagination_request; returns (page, pagination_response)"""
+    pagination = body.get("pagination_request") or {}
+    limit = pagination.get("limit") or max_page_size
+    limit = min(limit, max_page_size)
+    offset = pagination.get("offset", 0)
+    page = items[offset:offset + limit]
+    return page, {"total": len(items), "limit": limit, "offset": offset}
+
+
+class FakePTSLServicer(PTSL_pb2_grpc.PTSLServicer):
+    """
+    PTSLServicer backed by a FakeSession
+
+    latency: default injected latency per command (seconds)
+    command_latency: per-CommandId overrides (seconds)
+    max_page_size: upper bound applied to pagination_request.limit
+    event_rate: synthetic PollEvents per second on the stream
+    serial: execute unary commands one at a time, like the Pro Tools command queue
+    """
+
+    def __init__(
+        self,
+        session: Optional[FakeSession] = None,
+        latency: float = 0.0,
+        command_latency: Optional[Dict[int, float]] = None,
+        max_page_size: int = 1000,
+        event_rate: float = 10.0,
+        seed: int = 0,
+        serial: bool = False,
+    ):
+        self.session = session or FakeSession.generate(tracks=8, clips=0, memory_locations=0)
+        self.latency = latency
+        self.command_latency = dict(command_latency or {})
+        self.max_page_size = max_page_size
+        self.event_rate = event_rate
+        self.session_id = uuid.uuid4().hex
+        self.subscriptions: set = set()
+        self.batch_jobs: Dict[str, dict] = {}
+        self.failures: Dict[int, list] = {}  # command -> [remaining, grpc code or None, error type]
+        self.tasks: Dict[str, tuple] = {}  # running streamed task_id -> (started_at, duration)
+        self.command_counts: Dict[int, int] = {}
+        self._rng = random.Random(seed)
+        self._counts_lock = threading.Lock()
+        self._queue_lock = threading.Lock() if serial else None
+
+    def set_latency(self, command: int, seconds: float) -> None:
+        """Override the injected latency of one command"""
+        self.command_latency[command] = seconds
+
+    def inject_failures(self, command: int, count: int = 1, code: Optional[grpc.StatusCode] = None,
+                        error_type: str = "CEType_PT_HostIsBusy") -> None:
+        """
+        Fail the next `count` unary calls of `command`: with gRPC status
+        `code` if given, else with a failed response carrying `error_type`
+        """
+        self.failures[command] = [count, code, error_type]
+
+    def _injected_failure(self, command: int, context) -> Optional[PTSL_pb2.Response]:
+        with self._counts_lock:
+            failure = self.failures.get(command)
+            if not failure or failure[0] <= 0:
+                return None
+            failure[0] -= 1
+        _, code, error_type = failure
+        if code is not None:
+            context.abort(code, "injected failure")
+        response = self._response(command, {}, status=PTSL_pb2.TStatus_Failed)
+        response.response_error_json = json.dumps({"errors": [
+            {"command_error_type": error_type, "command_error_message": "injected failure", "is_warning": False}
+        ]})
+        return response
+
+    def _response(self, command: int, body: dict, status: int = PTSL_pb2.TStatus_Completed,
+                  progress: int = 100, task_id: str = "") -> PTSL_pb2.Response:
+        response = PTSL_pb2.Response()
+        response.header.task_id = task_id or uuid.uuid4().hex
+        response.header.command = command
+        response.header.status = status
+        response.header.progress = progress
+        response.response_body_json = json.dumps(body)
+        return response
+
+    def _prepare(self, request, delay: bool = True) -> tuple:
+        command = request.header.command
+        with self._counts_lock:
+            self.command_counts[command] = self.command_counts.get(command, 0) + 1
+        if request.header.versioned_request_header_json:
+            self._track_batch(json.loads(request.header.versioned_request_header_json))
+        latency = self.command_latency.get(command, self.latency)
+        if latency and delay:
+            if self._queue_lock is not None:
+                with self._queue_lock:
+                    time.sleep(latency)
+            else:
+                time.sleep(latency)
+        body = json.loads(request.request_body_json or "{}")
+        return command, body
+
+    def _track_batch(self, header: dict) -> None:
+        batch = header.get("batch_job_header") or {}
+        job = self.batch_jobs.get(batch.get("id", ""))
+        if job is not None:
+            with self._counts_lock:
+                job["commands"] += 1
+                job["progress"] = max(job["progress"], batch.get("progress", 0))
+
+    # ------------------------------------------------------------------
+    # gRPC methods
+    # ------------------------------------------------------------------
+
+    def SendGrpcRequest(self, request, context):
+        command, body = self._prepare(request)
+        failed = self._injected_failure(command, context)
+        if failed is not None:
+            return failed
+        return self._response(command, self.handle(command, body))
+
+    def SendGrpcStreamingRequest(self, request, context):
+        command, body = self._prepare(request, delay=False)
+        if command == CommandId.PollEvents:
+            yield from self._poll_events(context)
+            return
+        # Other commands run as a task lasting their injected latency: an
+        # InProgress response carrying the task_id, then the final one
+        task_id = uuid.uuid4().hex
+        duration = self.command_latency.get(command, self.latency)
+        self.tasks[task_id] = (time.monotonic(), duration)
+        try:
+            yield self._response(command, {}, status=PTSL_pb2.TStatus_InProgress, progress=0, task_id=task_id)
+            time.sleep(duration)
+            yield self._response(command, self.handle(command, body), task_id=task_id)
+        finally:
+            self.tasks.pop(task_id, None)
+
+    def _poll_events(self, context) -> Iterator[PTSL_pb2.Response]:
+        """Emit synthetic events at `event_rate` until the client cancels"""
+        interval = 1.0 / self.event_rate if self.event_rate > 0 else None
+        next_at = time.monotonic()
+        while context.is_active():
+            if interval is None:
+                time.sleep(0.1)
+                continue
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            event = self.next_event()
+            if event is not None:
+                yield self._response(CommandId.PollEvents, {"event": event}, status=PTSL_pb2.TStatus_InProgress)
+
+    def next_event(self) -> Optional[dict]:
+        """Toggle a random track state and describe it as a PollEvents event"""
+        session = self.session
+        with session.lock:
+            if not session.tracks:
+                return None
+            event_id = self._rng.choice(list(TRACK_STATE_EVENTS))
+            track = self._rng.choice(session.tracks)
+            attributes = track["track_attributes"]
+            attribute = TRACK_STATE_EVENTS[event_id]
+            attributes[attribute] = not attributes[attribute]
+            return {
+                "event_id": event_id,
+                "event_data_json": json.dumps({"track_id": track["id"], "state": attributes[attribute]}),
+            }
+
+    # ------------------------------------------------------------------
+    # Command handlers
+    # ------------------------------------------------------------------
+
+    def handle(self, command: int, body: dict) -> dict:
+        session = self.session
+        if command == CommandId.RegisterConnection:
+            return {"session_id": self.session_id}
+        if command == CommandId.GetTransportState:
+            return {"current_setting": session.transport_state}
+        if command == CommandId.GetSessionName:
+            return {"session_name": session.name}
+        if command == CommandId.GetRecordMode:
+            return {"current_setting": session.record_mode}
+        if command == CommandId.GetSessionSampleRate:
+            return {"sample_rate": session.sample_rate}
+        if command == CommandId.GetMainCounterFormat:
+            return {"current_setting": session.main_counter.replace("TLType_", ""), "current_type": session.main_counter}
+        if command == CommandId.GetTimeAsType:
+            # Samples <-> seconds only
+            location = body.get("location", {})
+            value, time_type = location.get("location", "0"), body.get("time_type", "TLType_Samples")
+            rate = int(session.sample_rate.rpartition("_")[2])  # "SR_48000"
+            try:
+                if location.get("time_type") == "TLType_Seconds" and time_type == "TLType_Samples":
+                    value = str(round(float(value) * rate))
+                elif location.get("time_type") == "TLType_Samples" and time_type == "TLType_Seconds":
+                    value = f"{int(value) / rate:.6f}"
+            except ValueError:
+                return {}
+            return {"converted_location": {"location": value, "time_type": time_type}}
+        if command == CommandId.GetTrackList:
+            page, pagination = _page(session.tracks, body, self.max_page_size)
+            return {"track_list": page, "pagination_response": pagination}
+        if command == CommandId.GetClipList:
+            page, pagination = _page(session.clips, body, self.max_page_size)
+            return {"clips": page, "pagination_response": pagination}
+        if command == CommandId.GetMemoryLocations:
+            page, pagination = _page(session.memory_locations, body, self.max_page_size)
+            return {"memory_locations": page, "pagination_response": pagination}
+        if command == CommandId.GetPlaylistElements:
+            # One element per clip, built only for the requested page
+            indices, pagination = _page(range(len(session.clips)), body, self.max_page_size)
+            page = [
+                {"start_time": {"location": str(i * 48000)}, "end_time": {"location": str((i + 1) * 48000)}}
+                for i in indices
+            ]
+            return {"elements_list": page, "pagination_response": pagination}
+        if command == CommandId.GetTrackControlInfo:
+            return {"control_info": [
+                {"control_id": body.get("control_id", {}), "min_value": -1.0, "max_value": 1.0, "steps": 0}
+                for _ in body.get("track_ids") or body.get("track_names") or []
+            ]}
+        if command in (CommandId.GetTrackControlBreakpoints, CommandId.SetTrackControlBreakpoints):
+            track_id = body.get("track_id", "")
+            if not track_id and body.get("track_name"):
+                track_id = (session.find_track(track_name=body["track_name"]) or {}).get("id", "")
+            key = (track_id, json.dumps(body.get("control_id", {}), sort_keys=True))
+            if command == CommandId.SetTrackControlBreakpoints:
+                # Replaces the whole curve, as in Pro Tools
+                session.automation[key] = body.get("breakpoints", [])
+                return {}
+            default = [{"time": {"location": "0", "time_type": "TLType_Samples"}, "value": 0.0}]
+            return {"breakpoints": session.automation.get(key, default)}
+        if command == CommandId.GetTaskStatus:
+            task_id = body.get("task_id", "")
+            if task_id not in self.tasks:
+                return {"task_id": task_id, "status": "TStatus_Completed", "progress": 100}
+            started_at, duration = self.tasks[task_id]
+            progress = int(100 * (time.monotonic() - started_at) / duration) if duration else 100
+            return {"task_id": task_id, "status": "TStatus_InProgress", "progress": min(99, progress)}
+        if command == CommandId.CreateBatchJob:
+            job_id = str(uuid.uuid4())
+            self.batch_jobs[job_id] = {
+                "job_data": body.get("job", {}), "status": "BJStatus_Running", "progress": 0, "commands": 0,
+            }
+            return {"id": job_id}
+        if command in (CommandId.CompleteBatchJob, CommandId.CancelBatchJob, CommandId.GetBatchJobStatus):
+            job = self.batch_jobs.get(body.get("id", ""))
+            if job is None:
+                return {}
+            if command == CommandId.CompleteBatchJob:
+                job.update(status="BJStatus_Completed", progress=100)
+            elif command == CommandId.CancelBatchJob:
+                job["status"] = "BJStatus_Canceled"
+            info = {k: job[k] for k in ("job_data", "status", "progress")}
+            return {"job_info": {**info, "id": body["id"]}}
+        if command == CommandId.Import:
+            # New track per file, named after it (content is not parsed)
+            audio_data = body.get("audio_data", {})
+            if audio_data.get("audio_destination") in ("MDestination_NewTrack", "MD_NewTrack"):
+                with session.lock:
+                    for path in audio_data.get("file_list", []):
+                        name, extension = os.path.splitext(os.path.basename(path))
+                        session.add_track(name, "TT_Midi" if extension.lower() in (".mid", ".midi") else "TT_Audio")
+            return {"audio_data": audio_data}
+        if command == CommandId.SubscribeToEvents:
+            self.subscriptions.update((e["event_id"], e.get("event_data_json", "")) for e in body.get("events", []))
+            return {}
+        if command == CommandId.UnsubscribeFromEvents:
+            self.subscriptions.difference_update(
+                (e["event_id"], e.get("event_data_json", "")) for e in body.get("events", [])
+            )
+            return {}
+        return {}
+
+
+def serve(servicer: PTSL_pb2_grpc.PTSLServicer, port: int = 31416, max_workers: int = 16) -> grpc.Server:
+    """Start a gRPC server for `servicer` on localhost:`port` (returns the started server)"""
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    PTSL_pb2_grpc.add_PTSLServicer_to_server(servicer, server)
+    server.add_insecure_port(f"localhost:{port}")
+    server.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PTSL stand-in server")
+    parser.add_argument("--port", type=int, default=31416)
+    parser.add_argument("--tracks", type=int, default=64)
+    parser.add_argument("--clips", type=int, default=256)
+    parser.add_argument("--memory-locations", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency per command")
+    parser.add_argument("--page-size", type=int, default=1000, help="Maximum items per paginated response")
+    parser.add_argument("--event-rate", type=float, default=10.0, help="PollEvents per second")
+    parser.add_argument("--serial", action="store_true", help="Run commands one at a time like Pro Tools")
+    args = parser.parse_args()
+
+    session = FakeSession.generate(args.tracks, args.clips, args.memory_locations)
+    servicer = FakePTSLServicer(
+        session,
+        latency=args.latency_ms / 1000,
+        max_page_size=args.page_size,
+        event_rate=args.event_rate,
+        serial=args.serial,
+    )
+    server = serve(servicer, port=args.port)
+    print(f"Fake PTSL server listening on localhost:{args.port} "
+          f"({len(session.tracks)} tracks, {len(session.clips)} clips, "
+          f"{len(session.memory_locations)} memory locations)")
+    server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+JSON codec for PTSL bodies
+Uses orjson or msgspec when installed and falls back to the stdlib json
+module; `LazyBody` defers parsing response_body_json until first access
+
+Set PTSL_JSON=json|orjson|msgspec to force a backend. Every backend
+encodes numpy scalars and arrays (e.g. automation values) as plain numbers
+and lists.
+"""
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, Union
+
+
+def _numpy_default(obj: Any) -> Any:
+    """numpy scalar/array -> Python number/list; numpy is never imported here"""
+    if type(obj).__module__ == "numpy" and hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib():
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, default=_numpy_default)
+
+    def pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_numpy_default)
+
+    return dumps, json.loads, pretty
+
+
+def _orjson():
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_numpy_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def pretty(obj: Any) -> str:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        return orjson.dumps(obj, default=_numpy_default, option=option).decode()
+
+    return dumps, orjson.loads, pretty
+
+
+def _msgspec():
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_numpy_default)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any) -> str:
+        return encoder.encode(obj).decode()
+
+    def pretty(obj: Any) -> str:
+        return msgspec.json.format(encoder.encode(obj), indent=2).decode()
+
+    return dumps, decoder.decode, pretty
+
+
+# Preference order; the first importable one wins
+BACKENDS = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+
+
+def use(name: str) -> None:
+    """Switch the process-wide backend (ImportError if it is not installed)"""
+    global BACKEND, dumps, loads, pretty
+    dumps, loads, pretty = BACKENDS[name]()
+    BACKEND = name
+
+
+def _select() -> None:
+    forced = os.environ.get("PTSL_JSON")
+    if forced:
+        use(forced)
+        return
+    for name in BACKENDS:
+        try:
+            use(name)
+            return
+        except ImportError:
+            continue
+
+
+BACKEND = "json"
+dumps: Callable[[Any], str]  # Compact JSON text
+loads: Callable[[Union[str, bytes]], Any]
+pretty: Callable[[Any], str]  # Indented JSON text, for humans
+_select()
+
+
+def loads_body(body_json: str) -> dict:
+    """Parsed request/response body; {} for an empty body"""
+    return loads(body_json) if body_json else {}
+
+
+def dumps_body(body: Any) -> str:
+    """request_body_json for a body; "{}" for None"""
+    return dumps(body) if body is not None else "{}"
+
+
+class LazyBody(Mapping):
+    """
+    Read-only response body parsed on first access
+
+    Callers that only check the status or pass the JSON on (e.g. to the
+    browser) never pay for parsing; `raw` is the original JSON text.
+    """
+
+    __slots__ = ("raw", "_parsed")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self._parsed = None
+
+    @property
+    def parsed(self) -> Dict[str, Any]:
+        if self._parsed is None:
+            self._parsed = loads_body(self.raw)
+        return self._parsed
+
+    @property
+    def is_parsed(self) -> bool:
+        return self._parsed is not None
+
+    def __getitem__(self, key: str) -> Any:
+        return self.parsed[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.parsed)
+
+    def __len__(self) -> int:
+        return len(self.parsed)
+
+    def __repr__(self) -> str:
+        return f"LazyBody({self.parsed!r})" if self.is_parsed else f"LazyBody(<{len(self.raw)} chars unparsed>)"
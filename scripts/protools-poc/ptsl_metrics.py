@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+PTSL RPC metrics
+gRPC client interceptor recording per-CommandId latency histograms,
+body sizes, queue vs. execution time and error rates, with an in-process
+snapshot and optional OpenTelemetry spans
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import grpc
+from ptsl_client import TASK_STATUS_FAILED, CommandId, _command_name, parse_errors
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # Tracing is optional
+    otel_trace = None
+
+# Latency bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+TASK_STATUS_IN_PROGRESS = 2  # TStatus_InProgress
+
+# Long-lived streams: not timed as commands
+UNTIMED_COMMANDS = {CommandId.PollEvents}
+
+
+class Histogram:
+    """Fixed-bucket histogram with count/sum/min/max and bucket-interpolated percentiles"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class CommandStats:
+    """Everything recorded for one CommandId"""
+
+    def __init__(self):
+        self.latency_ms = Histogram()
+        self.queue_ms = Histogram()  # Streamed commands: call start -> first InProgress response
+        self.execution_ms = Histogram()  # Streamed commands: first InProgress -> final response
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.max_response_bytes = 0
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def summary(self) -> dict:
+        calls = self.latency_ms.count
+        summary = {
+            "calls": calls,
+            "errors": dict(self.errors),
+            "error_rate": self.error_count / calls if calls else 0.0,
+            "latency_ms": self.latency_ms.summary(),
+            "avg_request_bytes": self.request_bytes / calls if calls else 0,
+            "avg_response_bytes": self.response_bytes / calls if calls else 0,
+            "max_response_bytes": self.max_response_bytes,
+        }
+        if self.queue_ms.count:
+            summary["queue_ms"] = self.queue_ms.summary()
+            summary["execution_ms"] = self.execution_ms.summary()
+        return summary
+
+
+def _response_error(response) -> Optional[str]:
+    """Error label for a PTSL-level failure carried in a successful RPC"""
+    errors = [e for e in parse_errors(response.response_error_json) if not e.get("is_warning")]
+    if errors:
+        return f"PTSL:{errors[0].get('command_error_type', 'unknown')}"
+    if response.header.status == TASK_STATUS_FAILED:
+        return "PTSL:TStatus_Failed"
+    return None
+
+
+class _TimedStream:
+    """Response iterator of a streamed call that records timings when it ends (other Call methods pass through)"""
+
+    def __init__(self, call, metrics: "PTSLMetrics", command: int, request_bytes: int, span):
+        self._call = call
+        self._metrics = metrics
+        self._command = command
+        self._request_bytes = request_bytes
+        self._span = span
+        self._started_at = time.perf_counter()
+        self._first_progress_at: Optional[float] = None
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            response = next(self._call)
+        except StopIteration:
+            self._finish(None, None)
+            raise
+        except grpc.RpcError as e:
+            self._finish(None, e.code().name)
+            raise
+        if response.header.status == TASK_STATUS_IN_PROGRESS:
+            if self._first_progress_at is None:
+                self._first_progress_at = time.perf_counter()
+        else:
+            self._finish(response, _response_error(response))
+        return response
+
+    def _finish(self, response, error: Optional[str]) -> None:
+        if self._done:
+            return
+        self._done = True
+        now = time.perf_counter()
+        queue_ms = execution_ms = None
+        if self._first_progress_at is not None:
+            queue_ms = (self._first_progress_at - self._started_at) * 1000
+            execution_ms = (now - self._first_progress_at) * 1000
+        self._metrics.record(
+            self._command, (now - self._started_at) * 1000, self._request_bytes,
+            len(response.response_body_json) if response is not None else 0,
+            error, queue_ms, execution_ms, self._span,
+            task_id=response.header.task_id if response is not None else "",
+        )
+
+
+class PTSLMetrics(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """
+    Client interceptor for the PTSL stub
+
+        metrics = PTSLMetrics()
+        client = PTSLClient(interceptors=[metrics])
+        ...
+        print(json.dumps(metrics.snapshot(), indent=2))
+
+    Unary calls record latency, body sizes and errors (gRPC status codes
+    and PTSL command errors). Streamed commands additionally split latency
+    into queue time (until the first InProgress response) and execution
+    time. With `tracing=True` and OpenTelemetry installed, each call is
+    also a span named "PTSL <Command>".
+    """
+
+    def __init__(self, tracing: bool = False, tracer_name: str = "ptsl"):
+        self._stats: Dict[int, CommandStats] = defaultdict(CommandStats)
+        self._lock = threading.Lock()
+        self._tracer = otel_trace.get_tracer(tracer_name) if tracing and otel_trace is not None else None
+        if tracing and otel_trace is None:
+            print("[PTSL] opentelemetry not installed, tracing disabled")
+
+    # ------------------------------------------------------------------
+    # Interceptor
+    # ------------------------------------------------------------------
+
+    def _start_span(self, command: int):
+        if self._tracer is None:
+            return None
+        span = self._tracer.start_span(f"PTSL {_command_name(command)}")
+        span.set_attribute("ptsl.command_id", int(command))
+        return span
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        command = request.header.command
+        request_bytes = len(request.request_body_json)
+        span = self._start_span(command)
+        started_at = time.perf_counter()
+        outcome = continuation(client_call_details, request)
+
+        def done(call):
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            error = call.code().name if call.code() != grpc.StatusCode.OK else None
+            response = call.result() if error is None else None
+            if response is not None:
+                error = _response_error(response)
+            self.record(
+                command, elapsed_ms, request_bytes,
+                len(response.response_body_json) if response is not None else 0,
+                error, span=span, task_id=response.header.task_id if response is not None else "",
+            )
+
+        outcome.add_done_callback(done)
+        return outcome
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        command = request.header.command
+        call = continuation(client_call_details, request)
+        if command in UNTIMED_COMMANDS:
+            return call
+        return _TimedStream(call, self, command, len(request.request_body_json), self._start_span(command))
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        command: int,
+        latency_ms: float,
+        request_bytes: int,
+        response_bytes: int,
+        error: Optional[str] = None,
+        queue_ms: Optional[float] = None,
+        execution_ms: Optional[float] = None,
+        span=None,
+        task_id: str = "",
+    ) -> None:
+        with self._lock:
+            stats = self._stats[command]
+            stats.latency_ms.record(latency_ms)
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.max_response_bytes = max(stats.max_response_bytes, response_bytes)
+            if error:
+                stats.errors[error] += 1
+            if queue_ms is not None:
+                stats.queue_ms.record(queue_ms)
+                stats.execution_ms.record(execution_ms)
+        if span is not None:
+            span.set_attribute("ptsl.request_bytes", request_bytes)
+            span.set_attribute("ptsl.response_bytes", response_bytes)
+            if task_id:
+                span.set_attribute("ptsl.task_id", task_id)
+            if queue_ms is not None:
+                span.set_attribute("ptsl.queue_ms", queue_ms)
+            if error:
+                span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, error))
+            span.end()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-command summary, slowest total time first"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: -item[1].latency_ms.total)
+            return {_command_name(command): stats.summary() for command, stats in items}
+
+    def hot_commands(self, top: int = 5) -> List[str]:
+        """Commands with the most total time spent: the first candidates for caching or batching"""
+        return list(self.snapshot())[:top]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
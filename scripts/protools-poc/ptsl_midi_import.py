@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Generated MIDI -> Pro Tools import pipeline
+Stages MIDI from the MIDI-LLM server (base64 `midiData` or raw bytes) as
+files Pro Tools can read, then imports each one onto a new track at a
+memory location, one batch job per batch of clips
+"""
+
+import base64
+import binascii
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Union
+
+from ptsl_batch import BatchJob
+from ptsl_client import CommandId, PTSLClient, PTSLError
+from ptsl_pagination import iter_memory_locations
+
+MIDI_HEADER = b"MThd"
+
+# Clips per batch job; each job adds a CreateBatchJob/CompleteBatchJob round trip
+DEFAULT_BATCH_SIZE = 24
+
+SAMPLES = "TLType_Samples"
+
+Location = Union[int, str, None]  # Sample position, memory location name/number, or session start
+
+
+@dataclass
+class GeneratedMidi:
+    """One generated MIDI file to place in the session"""
+
+    name: str
+    data: bytes
+    location: Location = None  # Overrides the pipeline's location
+
+    @classmethod
+    def from_generation(cls, name: str, result: dict, location: Location = None) -> "GeneratedMidi":
+        """From a MIDI-LLM `generate` result ({"success", "midiData", ...})"""
+        if not result.get("success"):
+            raise ValueError(f"{name}: generation failed: {result.get('error', 'unknown error')}")
+        try:
+            data = base64.b64decode(result["midiData"], validate=True)
+        except (KeyError, binascii.Error) as e:
+            raise ValueError(f"{name}: invalid midiData") from e
+        return cls(name, data, location)
+
+
+@dataclass
+class ImportResult:
+    name: str
+    path: str
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class MidiStaging:
+    """
+    Directory of staged .mid files
+
+    Pro Tools reads imported files by path, so the directory must be
+    visible to it: a private temp directory when Pro Tools runs on this
+    machine, or a shared volume mounted on both hosts. Files are written
+    under a temporary name and renamed, so Pro Tools never sees a partial
+    file, and deleted once imported (Import copies them into the session)
+    unless `keep` is set.
+    """
+
+    def __init__(self, directory: Optional[str] = None, keep: bool = False):
+        self.owned = directory is None
+        self.directory = directory or tempfile.mkdtemp(prefix="ptsl-midi-")
+        self.keep = keep
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write(self, item: GeneratedMidi) -> str:
+        if not item.data.startswith(MIDI_HEADER):
+            raise ValueError(f"{item.name}: not a standard MIDI file")
+        # One subdirectory per file keeps the file name (and so the new track's name) clean
+        stem = re.sub(r"[^\w\- ]+", "_", item.name).strip() or "generated"
+        folder = os.path.join(self.directory, uuid.uuid4().hex[:12])
+        os.mkdir(folder)
+        path = os.path.join(folder, f"{stem}.mid")
+        partial = path + ".part"
+        with open(partial, "wb") as f:
+            f.write(item.data)
+        os.replace(partial, path)
+        return path
+
+    def release(self, path: str) -> None:
+        if not self.keep:
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+    def close(self) -> None:
+        if self.owned and not self.keep:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def import_body(path: str, location_samples: Optional[str] = None) -> dict:
+    """Import (CId 2) body placing one file on a new track, spotted at `location_samples` or session start"""
+    audio_data = {
+        "file_list": [path],
+        "audio_operations": "AOperations_CopyAudio",
+        "audio_destination": "MDestination_NewTrack",
+        "audio_location": "MLocation_SessionStart",
+    }
+    if location_samples is not None:
+        audio_data["audio_location"] = "MLocation_Spot"
+        audio_data["location_data"] = {
+            "location_type": "SLType_Start",
+            "location": {"location": str(location_samples), "time_type": "TLType_Samples"},
+        }
+    return {"import_type": "IType_Audio", "audio_data": audio_data}
+
+
+class MidiImportPipeline:
+    """
+    Import generated MIDI in batches
+
+        with MidiImportPipeline(client, location="Exercises") as pipeline:
+            for i, result in enumerate(generations):
+                pipeline.add(GeneratedMidi.from_generation(f"Exercise {i + 1}", result))
+
+    `add` stages the file immediately and queues it; every `batch_size`
+    clips (or, on a timer, when the oldest queued clip is `max_wait`
+    seconds old) the batch is imported as one batch job on a background thread, so
+    generation keeps going while Pro Tools imports. Each clip is its own
+    Import, so one bad file fails alone instead of canceling the batch.
+    Staged files are removed after their batch.
+    """
+
+    def __init__(
+        self,
+        client: PTSLClient,
+        location: Location = None,
+        staging: Optional[MidiStaging] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_wait: float = 30.0,
+        max_in_flight: int = 1,
+        job_name: str = "Import generated MIDI",
+    ):
+        self.client = client
+        self.location = location
+        self.staging = staging or MidiStaging()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self.job_name = job_name
+        self.results: List[ImportResult] = []
+        self.batches = 0
+
+        self._pending: List[tuple] = []  # (item, path)
+        self._pending_since = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._memory_locations: Optional[Dict[str, str]] = None  # Number/name -> start_time as Pro Tools gave it
+        self._counter_type: Optional[str] = None  # TimelineLocationType of those start times
+        self._samples: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._importer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptsl-midi-import")
+        self._batches: List[Future] = []
+        self._started_at = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Import what is still queued, wait for all batches and remove the staging directory"""
+        self.flush()
+        self._importer.shutdown(wait=True)
+        self.staging.close()
+
+    # ------------------------------------------------------------------
+    # Locations
+    # ------------------------------------------------------------------
+
+    def resolve_location(self, location: Location) -> Optional[str]:
+        """
+        Sample position (string) for a location
+
+        Memory locations are looked up once per pipeline. Their start times
+        are in the Main Counter's format (bars|beats, timecode, ...), so
+        unless it is samples each one used is converted with GetTimeAsType
+        (once); a start time that cannot be turned into samples is an error.
+        """
+        if location is None or isinstance(location, int):
+            return None if location is None else str(location)
+        if self._memory_locations is None:
+            self._counter_type = self._main_counter_type()
+            self._memory_locations = {}
+            for marker in iter_memory_locations(self.client):
+                self._memory_locations.setdefault(str(marker.get("number", "")), marker.get("start_time", "0"))
+                self._memory_locations.setdefault(marker.get("name", ""), marker.get("start_time", "0"))
+        if location not in self._memory_locations:
+            raise PTSLError(CommandId.GetMemoryLocations, f"no memory location '{location}'")
+        if location not in self._samples:
+            self._samples[location] = self._to_samples(location, self._memory_locations[location])
+        return self._samples[location]
+
+    def _main_counter_type(self) -> Optional[str]:
+        """TimelineLocationType of the Main Counter; None if Pro Tools is too old to say"""
+        try:
+            body = self.client.send(CommandId.GetMainCounterFormat)
+        except PTSLError:
+            return None
+        if body.get("current_type"):
+            return body["current_type"]
+        setting = body.get("current_setting", "")  # Before 2025.06: "Samples", "BarsBeats", ...
+        return f"TLType_{setting.rpartition('_')[2]}" if setting else None
+
+    def _to_samples(self, location: str, start_time: str) -> str:
+        time_type = self._counter_type
+        if time_type == SAMPLES or (time_type is None and start_time.isdigit()):
+            samples = start_time
+        elif time_type is None:
+            samples = ""
+        else:
+            body = {"location": {"location": start_time, "time_type": time_type}, "time_type": SAMPLES}
+            converted = self.client.send(CommandId.GetTimeAsType, body).get("converted_location", {})
+            samples = converted.get("location", "") if converted.get("time_type", SAMPLES) == SAMPLES else ""
+        samples = samples.strip()
+        if not samples.isdigit():
+            raise PTSLError(
+                CommandId.GetMemoryLocations,
+                f"memory location '{location}' is at '{start_time}' ({time_type or 'unknown format'}), "
+                "not a sample position",
+            )
+        return samples
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    def add(self, item: GeneratedMidi) -> None:
+        path = self.staging.write(item)
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+                # Flushes the batch if it is still the one pending when max_wait runs out
+                self._timer = threading.Timer(self.max_wait, self._flush_if_pending_since, (self._pending_since,))
+                self._timer.daemon = True
+                self._timer.start()
+            self._pending.append((item, path))
+            due = len(self._pending) >= self.batch_size
+        if due:
+            self.flush()
+
+    def _flush_if_pending_since(self, since: float) -> None:
+        with self._lock:
+            due = bool(self._pending) and self._pending_since == since
+        if due:
+            self.flush()
+
+    def run(self, items: Iterable[GeneratedMidi]) -> dict:
+        """Import every item of a (possibly streaming) iterable; returns `stats()`"""
+        for item in items:
+            self.add(item)
+        self.flush()
+        self.wait()
+        return self.stats()
+
+    def flush(self) -> Optional[Future]:
+        """Import the queued clips as one batch job; returns a Future of its results"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+            if not batch:
+                return None
+            # Submitted under the lock so a timer flush cannot race close() shutting the importer down
+            future = self._importer.submit(self._import_batch, batch)
+            self._batches.append(future)
+        return future
+
+    def wait(self) -> None:
+        for future in list(self._batches):
+            future.result()
+
+    def _import_batch(self, batch: List[tuple]) -> List[ImportResult]:
+        results = []
+        bodies = []
+        try:
+            for item, path in batch:
+                try:
+                    location = self.resolve_location(item.location if item.location is not None else self.location)
+                except PTSLError as e:
+                    results.append(ImportResult(item.name, path, e))
+                    continue
+                bodies.append((item, path, import_body(path, location)))
+            if bodies:
+                job = BatchJob(
+                    self.client, self.job_name, f"{len(bodies)} generated MIDI clips",
+                    cancel_on_failure=False, max_in_flight=self.max_in_flight, expected=len(bodies),
+                )
+                with job:
+                    futures = [job.submit(CommandId.Import, body) for _, _, body in bodies]
+                results.extend(
+                    ImportResult(item.name, path, future.exception())
+                    for (item, path, _), future in zip(bodies, futures)
+                )
+        except Exception as e:
+            # The job itself failed (e.g. Pro Tools unreachable): every clip not yet accounted for failed with it
+            done = {r.path for r in results}
+            results.extend(ImportResult(item.name, path, e) for item, path in batch if path not in done)
+        finally:
+            for _, path in batch:
+                self.staging.release(path)
+        failed = sum(not r.ok for r in results)
+        if failed:
+            print(f"[PTSL] MIDI import: {failed}/{len(batch)} clips failed")
+        with self._lock:
+            self.results.extend(results)
+            self.batches += 1
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            imported = sum(r.ok for r in self.results)
+            elapsed = time.perf_counter() - self._started_at
+            return {
+                "imported": imported,
+                "failed": len(self.results) - imported,
+                "pending": len(self._pending),
+                "batches": self.batches,
+                "per_minute": 60 * imported / elapsed if elapsed else 0.0,
+            }
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Auto-paginating PTSL iterators
+Walk PaginationResponse total/offset for the list getters, prefetching the
+next page while the caller processes the current one
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import ptsl_json
+from ptsl_client import CommandId, PTSLClient
+
+# List getters and the response field holding their items
+PAGINATED_COMMANDS = {
+    CommandId.GetTrackList: "track_list",
+    CommandId.GetClipList: "clips",
+    CommandId.GetMemoryLocations: "memory_locations",
+    CommandId.GetPlaylistElements: "elements_list",
+}
+
+
+class AdaptivePageSize:
+    """
+    Page size that tracks a target fetch time
+
+    Grows while pages come back faster than `target_ms` and shrinks when
+    they are slower, by at most 2x per page, within [minimum, maximum].
+    """
+
+    def __init__(self, initial: int = 100, minimum: int = 25, maximum: int = 5000, target_ms: float = 100.0):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_ms = target_ms
+
+    def update(self, items: int, elapsed_ms: float) -> int:
+        if items and elapsed_ms > 0:
+            factor = min(2.0, max(0.5, self.target_ms / elapsed_ms))
+            self.size = int(min(self.maximum, max(self.minimum, self.size * factor)))
+        return self.size
+
+
+def iter_pages(
+    client: PTSLClient,
+    command_id: int,
+    body: Optional[dict] = None,
+    page_size: int = 100,
+    adaptive: bool = True,
+    prefetch: bool = True,
+) -> Iterator[list]:
+    """
+    Yield successive pages (lists of item dicts) of a paginated getter
+
+    `body` is the request body without `pagination_request`. With
+    `prefetch`, the next page is requested in a background thread before
+    the current one is yielded.
+    """
+    field = PAGINATED_COMMANDS[command_id]
+    sizer = AdaptivePageSize(initial=page_size) if adaptive else None
+    base_body = dict(body or {})
+
+    def fetch(offset: int, limit: int) -> tuple:
+        request_body = {**base_body, "pagination_request": {"limit": limit, "offset": offset}}
+        started_at = time.perf_counter()
+        response = client.send_command(command_id, ptsl_json.dumps(request_body))
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        parsed = ptsl_json.loads_body(response.response_body_json)
+        return parsed.get(field, []), parsed.get("pagination_response") or {}, limit, elapsed_ms
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ptsl-prefetch") if prefetch else None
+    try:
+        offset = 0
+        pending = executor.submit(fetch, offset, page_size) if executor else None
+        limit = page_size
+        while True:
+            items, pagination, limit, elapsed_ms = pending.result() if pending else fetch(offset, limit)
+            if sizer:
+                sizer.update(len(items), elapsed_ms)
+
+            offset += len(items)
+            total = pagination.get("total")
+            done = not items or (offset >= total if total is not None else len(items) < limit)
+
+            next_limit = sizer.size if sizer else page_size
+            pending = None
+            if not done and executor:
+                pending = executor.submit(fetch, offset, next_limit)
+            limit = next_limit
+
+            if items:
+                yield items
+            if done:
+                return
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_items(client: PTSLClient, command_id: int, body: Optional[dict] = None, **kwargs) -> Iterator[dict]:
+    """Yield items of a paginated getter one by one (see iter_pages)"""
+    for page in iter_pages(client, command_id, body, **kwargs):
+        yield from page
+
+
+def iter_tracks(client: PTSLClient, track_filter: str = "TLFilter_All", **kwargs) -> Iterator[dict]:
+    """All tracks via GetTrackList (CId 3)"""
+    body = {
+        "track_filter_list": [{"filter": track_filter, "is_inverted": False}],
+        "is_filter_list_additive": True,
+    }
+    return iter_items(client, CommandId.GetTrackList, body, **kwargs)
+
+
+def iter_clips(client: PTSLClient, **kwargs) -> Iterator[dict]:
+    """All clips via GetClipList (CId 125)"""
+    return iter_items(client, CommandId.GetClipList, None, **kwargs)
+
+
+def iter_memory_locations(client: PTSLClient, **kwargs) -> Iterator[dict]:
+    """All memory locations via GetMemoryLocations (CId 69)"""
+    return iter_items(client, CommandId.GetMemoryLocations, None, **kwargs)
+
+
+def iter_playlist_elements(client: PTSLClient, playlist_name: str = "", playlist_id: str = "", **kwargs) -> Iterator[dict]:
+    """All elements of one playlist via GetPlaylistElements (CId 158)"""
+    body = {"playlist_name": playlist_name, "playlist_id": playlist_id}
+    return iter_items(client, CommandId.GetPlaylistElements, body, **kwargs)
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+PTSL connection pool
+One client (channel + registered session) per Pro Tools host, routing
+commands by least outstanding work or session affinity, with health
+checks and graceful draining
+"""
+
+import collections
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+import grpc
+from ptsl_client import CommandId, PTSLClient, PTSLError
+
+# Cheap getter used to probe hosts
+HEALTH_CHECK_COMMAND = CommandId.GetTransportState
+
+# Hosts probed at once by check_health
+MAX_CONCURRENT_PROBES = 16
+
+# Affinity keys remembered (least recently used are forgotten first)
+MAX_AFFINITY_KEYS = 10000
+
+
+class Endpoint:
+    """One Pro Tools host in the pool"""
+
+    def __init__(self, address: str, client: PTSLClient):
+        self.address = address
+        self.client = client
+        self.outstanding = 0  # Work units in flight
+        self.completed = 0
+        self.failed = 0
+        self.healthy = True
+        self.draining = False
+        self.ejected_until = 0.0  # time.monotonic() at which an unhealthy host gets traffic again
+        self.last_check_ms: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        return not self.draining and (self.healthy or time.monotonic() >= self.ejected_until)
+
+    def eject(self, seconds: float) -> None:
+        self.healthy = False
+        self.ejected_until = time.monotonic() + seconds
+
+
+class NoEndpointAvailableError(PTSLError):
+    """Every host in the pool is unhealthy or draining"""
+
+
+class PTSLPool:
+    """
+    Pool of PTSL hosts
+
+    Commands go to the available host with the least outstanding work
+    (`cost` units per command, 1 by default), or, with an `affinity` key,
+    to the host that key used last as long as it stays available, so
+    commands about the same session or job land on the same Pro Tools.
+
+    A host that answers UNAVAILABLE (or fails a probe) is ejected for
+    `eject_for` seconds, then gets traffic again; the first command that
+    succeeds marks it healthy, and one that fails ejects it again.
+    `start_health_checks` probes every host with a cheap getter so hosts
+    are ejected before a command fails and restored as soon as they
+    answer. At most `max_affinity_keys` affinity keys are remembered.
+    """
+
+    def __init__(
+        self,
+        addresses: Iterable[str],
+        client_factory: Callable[[str], PTSLClient] = PTSLClient,
+        health_interval: float = 5.0,
+        health_timeout: float = 2.0,
+        eject_for: float = 5.0,
+        max_affinity_keys: int = MAX_AFFINITY_KEYS,
+        max_workers: int = 32,
+    ):
+        self.client_factory = client_factory
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.eject_for = eject_for
+        self.max_affinity_keys = max_affinity_keys
+
+        self._endpoints: Dict[str, Endpoint] = {}
+        self._affinity: "collections.OrderedDict[str, str]" = collections.OrderedDict()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ptsl-pool")
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self._probe_executor: Optional[ThreadPoolExecutor] = None
+        for address in addresses:
+            self.add_endpoint(address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._health_thread:
+            self._health_thread.join()
+        if self._probe_executor is not None:
+            self._probe_executor.shutdown(wait=True)
+        self._executor.shutdown(wait=True)
+        with self._condition:
+            for endpoint in self._endpoints.values():
+                endpoint.client.close()
+            self._endpoints.clear()
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        with self._condition:
+            return list(self._endpoints.values())
+
+    # ------------------------------------------------------------------
+    # Membership
+    # ------------------------------------------------------------------
+
+    def add_endpoint(self, address: str) -> Endpoint:
+        endpoint = Endpoint(address, self.client_factory(address))
+        with self._condition:
+            self._endpoints[address] = endpoint
+            self._condition.notify_all()
+        return endpoint
+
+    def drain(self, address: str, timeout: Optional[float] = None) -> bool:
+        """
+        Stop routing to `address`, wait for its in-flight work, then remove it
+
+        Returns False (and leaves the host draining) if work is still in
+        flight after `timeout` seconds.
+        """
+        with self._condition:
+            endpoint = self._endpoints[address]
+            endpoint.draining = True
+            if not self._condition.wait_for(lambda: endpoint.outstanding == 0, timeout):
+                return False
+            del self._endpoints[address]
+            self._affinity = collections.OrderedDict(
+                (key, a) for key, a in self._affinity.items() if a != address
+            )
+        endpoint.client.close()
+        print(f"[PTSL] Drained {address} ({endpoint.completed} commands)")
+        return True
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def _pick(self, affinity: Optional[str], command_id: int) -> Endpoint:
+        available = [e for e in self._endpoints.values() if e.available]
+        if not available:
+            raise NoEndpointAvailableError(command_id, "no healthy PTSL host available")
+        if affinity is not None:
+            endpoint = self._endpoints.get(self._affinity.get(affinity, ""))
+            if endpoint is not None and endpoint.available:
+                self._affinity.move_to_end(affinity)
+                return endpoint
+        endpoint = min(available, key=lambda e: (e.outstanding, e.completed))
+        if affinity is not None:
+            self._affinity[affinity] = endpoint.address
+            self._affinity.move_to_end(affinity)
+            while len(self._affinity) > self.max_affinity_keys:
+                self._affinity.popitem(last=False)
+        return endpoint
+
+    @contextmanager
+    def acquire(self, affinity: Optional[str] = None, cost: int = 1, command_id: int = 0):
+        """Reserve a host for `cost` units of work; yields its Endpoint"""
+        with self._condition:
+            endpoint = self._pick(affinity, command_id)
+            endpoint.outstanding += cost
+        ok = False
+        try:
+            yield endpoint
+            ok = True
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                # Host gone: stop routing to it for a while, then let traffic (or a probe) retry it
+                with self._condition:
+                    endpoint.eject(self.eject_for)
+                print(f"[PTSL] {endpoint.address} unavailable, ejected for {self.eject_for:g}s")
+            raise
+        finally:
+            with self._condition:
+                endpoint.outstanding -= cost
+                if ok:
+                    endpoint.completed += 1
+                    if not endpoint.healthy:
+                        print(f"[PTSL] {endpoint.address} healthy again")
+                        endpoint.healthy = True
+                else:
+                    endpoint.failed += 1
+                self._condition.notify_all()
+
+    def send(
+        self,
+        command_id: int,
+        body: Optional[dict] = None,
+        affinity: Optional[str] = None,
+        cost: int = 1,
+        timeout: Optional[float] = None,
+    ) -> dict:
+        """Route one command and return its parsed response body"""
+        with self.acquire(affinity, cost, command_id) as endpoint:
+            return endpoint.client.send(command_id, body, timeout=timeout)
+
+    def submit(self, command_id: int, body: Optional[dict] = None, affinity: Optional[str] = None,
+               cost: int = 1, timeout: Optional[float] = None) -> Future:
+        """`send` on the pool's worker threads; returns a Future of the response body"""
+        return self._executor.submit(self.send, command_id, body, affinity, cost, timeout)
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+
+    def check_health(self) -> Dict[str, bool]:
+        """
+        Probe every host once, concurrently; returns address -> healthy
+
+        Each RPC of a probe, including the RegisterConnection of a host not
+        registered yet, is limited to `health_timeout`, so a stalled host
+        neither hangs the check nor delays the other hosts' probes.
+        """
+        endpoints = self.endpoints
+        if not endpoints:
+            return {}
+        with self._condition:
+            if self._probe_executor is None:
+                self._probe_executor = ThreadPoolExecutor(
+                    max_workers=MAX_CONCURRENT_PROBES, thread_name_prefix="ptsl-pool-probe"
+                )
+        probes = [self._probe_executor.submit(self._probe, endpoint) for endpoint in endpoints]
+        return {endpoint.address: probe.result() for endpoint, probe in zip(endpoints, probes)}
+
+    def _probe(self, endpoint: Endpoint) -> bool:
+        started_at = time.perf_counter()
+        try:
+            # send() registers first if needed, under the same timeout
+            endpoint.client.send(HEALTH_CHECK_COMMAND, timeout=self.health_timeout)
+            healthy = True
+        except Exception as e:
+            healthy = False
+            if endpoint.healthy:
+                print(f"[PTSL] {endpoint.address} unhealthy: {type(e).__name__}")
+        endpoint.last_check_ms = (time.perf_counter() - started_at) * 1000
+        with self._condition:
+            if healthy and not endpoint.healthy:
+                print(f"[PTSL] {endpoint.address} healthy again")
+            if healthy:
+                endpoint.healthy = True
+            else:
+                endpoint.eject(self.eject_for)
+            self._condition.notify_all()
+        return healthy
+
+    def start_health_checks(self) -> "PTSLPool":
+        def run():
+            while not self._stop.wait(self.health_interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=run, name="ptsl-pool-health", daemon=True)
+        self._health_thread.start()
+        return self
+
+    def stats(self) -> Dict[str, dict]:
+        with self._condition:
+            return {
+                e.address: {
+                    "outstanding": e.outstanding,
+                    "completed": e.completed,
+                    "failed": e.failed,
+                    "healthy": e.healthy,
+                    "available": e.available,
+                    "draining": e.draining,
+                    "last_check_ms": e.last_check_ms,
+                }
+                for e in self._endpoints.values()
+            }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Lazily loaded PTSL protobuf modules
+`ptsl_proto.Request`, `ptsl_proto.PTSLStub`, ... resolve to PTSL_pb2 /
+PTSL_pb2_grpc attributes; the generated modules (descriptor pool build and
+the grpc version check) are imported on first access, not at startup
+
+Set PTSL_IMPORT_TIMING=1 to print load times, or run this file for a report.
+"""
+
+import importlib
+import os
+import sys
+import time
+from typing import Dict
+
+PB2 = "PTSL_pb2"
+PB2_GRPC = "PTSL_pb2_grpc"
+
+# Names resolved from PTSL_pb2_grpc; everything else comes from PTSL_pb2
+_GRPC_NAMES = {"PTSLStub", "PTSLServicer", "add_PTSLServicer_to_server"}
+
+# Module name -> load time in ms (only modules loaded through this module)
+import_times_ms: Dict[str, float] = {}
+
+
+def load(module_name: str):
+    """Import a generated module once, recording how long it took"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    started_at = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_times_ms[module_name] = (time.perf_counter() - started_at) * 1000
+    if os.environ.get("PTSL_IMPORT_TIMING") == "1":
+        print(f"[PTSL] {module_name} loaded in {import_times_ms[module_name]:.1f} ms ({backend()} backend)")
+    return module
+
+
+def backend() -> str:
+    """Active protobuf implementation: 'upb', 'cpp' or 'python' (pure Python, slow)"""
+    from google.protobuf.internal import api_implementation
+    return api_implementation.Type()
+
+
+def __getattr__(name: str):
+    if name in ("pb2", "pb2_grpc"):
+        return load(PB2 if name == "pb2" else PB2_GRPC)
+    module = load(PB2_GRPC if name in _GRPC_NAMES else PB2)
+    try:
+        value = getattr(module, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def main():
+    started_at = time.perf_counter()
+    import grpc  # noqa: F401  (the client needs it anyway; measured separately)
+    grpc_ms = (time.perf_counter() - started_at) * 1000
+    load(PB2)
+    load(PB2_GRPC)
+    print(f"protobuf backend: {backend()}")
+    print(f"grpc:             {grpc_ms:7.1f} ms")
+    for module_name, elapsed_ms in import_times_ms.items():
+        print(f"{module_name + ':':17s} {elapsed_ms:7.1f} ms")
+    if backend() == "python":
+        print("Warning: pure-Python protobuf; unset PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION to use upb")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+PTSL record and replay
+Captures every PTSL Request/Response (including stream responses) with
+timestamps into a compact binary log, and serves a log from a stand-in
+PTSLServicer at original or accelerated speed, so client changes can be
+benchmarked against real traffic shapes offline
+
+Log format: the MAGIC header, then one record per message:
+    <kind u8> <call_id u32> <offset f64 seconds> <length u32> <payload>
+(little-endian). The payload is a serialized PTSL Request or Response, or
+"<StatusCode name>\\n<details>" for a failed call.
+
+Usage:
+    recorder = PTSLRecorder("session.ptslrec")
+    client = PTSLClient(interceptors=[recorder])
+    ...
+    recorder.close()
+
+    python ptsl_replay.py info session.ptslrec
+    python ptsl_replay.py serve session.ptslrec --speed 4
+"""
+
+import argparse
+import collections
+import itertools
+import json
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+
+import grpc
+import ptsl_proto
+import PTSL_pb2_grpc
+from ptsl_client import _command_name
+
+MAGIC = b"PTSLREC1"
+RECORD_HEADER = struct.Struct("<BIdI")
+
+# Record kinds
+UNARY_REQUEST = 1
+STREAM_REQUEST = 2
+RESPONSE = 3
+ERROR = 4
+
+
+class PTSLRecorder(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """
+    Client interceptor writing every call to a PTSL log
+
+    Offsets are seconds since the recorder was created. Writes are
+    serialized with a lock, so one recorder can be shared by clients on
+    several threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.calls = 0
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(MAGIC)
+        self._started_at = time.monotonic()
+        self._call_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                print(f"[PTSL] Recorded {self.calls} calls to {self.path}")
+
+    def write(self, kind: int, call_id: int, payload: bytes) -> None:
+        offset = time.monotonic() - self._started_at
+        with self._lock:
+            if self._file.closed:
+                return  # Late responses after close are dropped
+            self._file.write(RECORD_HEADER.pack(kind, call_id, offset, len(payload)))
+            self._file.write(payload)
+
+    def _begin(self, kind: int, request) -> int:
+        call_id = next(self._call_ids)
+        self.calls += 1
+        self.write(kind, call_id, request.SerializeToString())
+        return call_id
+
+    def _error(self, call_id: int, error: grpc.RpcError) -> None:
+        self.write(ERROR, call_id, f"{error.code().name}\n{error.details() or ''}".encode())
+
+    # ------------------------------------------------------------------
+    # Interceptor
+    # ------------------------------------------------------------------
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        call_id = self._begin(UNARY_REQUEST, request)
+        outcome = continuation(client_call_details, request)
+
+        def done(call):
+            if call.code() == grpc.StatusCode.OK:
+                self.write(RESPONSE, call_id, call.result().SerializeToString())
+            else:
+                self._error(call_id, call)
+
+        outcome.add_done_callback(done)
+        return outcome
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        call_id = self._begin(STREAM_REQUEST, request)
+        return _RecordedStream(continuation(client_call_details, request), self, call_id)
+
+
+class _RecordedStream:
+    """Response iterator of a streamed call that records each response (other Call methods pass through)"""
+
+    def __init__(self, call, recorder: PTSLRecorder, call_id: int):
+        self._call = call
+        self._recorder = recorder
+        self._call_id = call_id
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            response = next(self._call)
+        except grpc.RpcError as e:
+            self._recorder._error(self._call_id, e)
+            raise
+        self._recorder.write(RESPONSE, self._call_id, response.SerializeToString())
+        return response
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class RecordedCall:
+    """One recorded RPC with its responses; offsets are seconds since recording started"""
+
+    call_id: int
+    request: ptsl_proto.Request
+    streaming: bool
+    started_at: float
+    responses: List[Tuple[float, ptsl_proto.Response]] = field(default_factory=list)
+    error: Optional[Tuple[str, str]] = None  # (StatusCode name, details)
+    ended_at: float = 0.0
+
+    @property
+    def command(self) -> int:
+        return self.request.header.command
+
+    @property
+    def key(self) -> tuple:
+        """What a replayed request must match: command and body"""
+        return self.command, self.request.request_body_json
+
+
+def read_records(path: str) -> Iterator[Tuple[int, int, float, bytes]]:
+    """(kind, call_id, offset, payload) for every record in a log"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a PTSL log")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return  # End of log (or a record cut short by a crash)
+            kind, call_id, offset, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield kind, call_id, offset, payload
+
+
+def load_calls(path: str) -> List[RecordedCall]:
+    """Recorded calls in the order they started"""
+    calls: Dict[int, RecordedCall] = {}
+    for kind, call_id, offset, payload in read_records(path):
+        if kind in (UNARY_REQUEST, STREAM_REQUEST):
+            calls[call_id] = RecordedCall(
+                call_id, ptsl_proto.Request.FromString(payload), kind == STREAM_REQUEST, offset, ended_at=offset
+            )
+            continue
+        call = calls.get(call_id)
+        if call is None:
+            continue
+        if kind == RESPONSE:
+            call.responses.append((offset, ptsl_proto.Response.FromString(payload)))
+        elif kind == ERROR:
+            code, _, details = payload.decode().partition("\n")
+            call.error = (code, details)
+        call.ended_at = offset
+    return sorted(calls.values(), key=lambda c: c.started_at)
+
+
+def summarize(calls: List[RecordedCall]) -> Dict[str, dict]:
+    """Per-command call count, errors and mean recorded latency (ms)"""
+    summary: Dict[str, dict] = {}
+    for call in calls:
+        entry = summary.setdefault(_command_name(call.command), {"calls": 0, "errors": 0, "total_ms": 0.0})
+        entry["calls"] += 1
+        entry["errors"] += call.error is not None
+        entry["total_ms"] += (call.ended_at - call.started_at) * 1000
+    for entry in summary.values():
+        entry["mean_ms"] = round(entry.pop("total_ms") / entry["calls"], 3)
+    return summary
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+
+class ReplayServicer(PTSL_pb2_grpc.PTSLServicer):
+    """
+    Stand-in PTSLServicer answering from a recorded log
+
+    Each incoming request is matched to the oldest unused recorded call
+    with the same command and body; without an exact match (and unless
+    `strict`), to the oldest unused call with the same command. Responses
+    are delayed by their recorded offsets divided by `speed` (0 replays
+    without delays). Recorded gRPC errors are replayed; a stream the client
+    canceled while recording stays open until the client cancels again.
+    Unmatched requests fail with NOT_FOUND and are counted in `misses`.
+    """
+
+    def __init__(self, calls: List[RecordedCall], speed: float = 1.0, strict: bool = False):
+        self.speed = speed
+        self.strict = strict
+        self.served = 0
+        self.misses: Dict[int, int] = collections.defaultdict(int)
+
+        self.total = len(calls)
+        self._by_key: Dict[tuple, Deque[RecordedCall]] = collections.defaultdict(collections.deque)
+        self._by_command: Dict[tuple, Deque[RecordedCall]] = collections.defaultdict(collections.deque)
+        self._used = set()
+        self._lock = threading.Lock()
+        for call in calls:
+            self._by_key[(call.streaming, *call.key)].append(call)
+            self._by_command[(call.streaming, call.command)].append(call)
+
+    @classmethod
+    def from_log(cls, path: str, **kwargs) -> "ReplayServicer":
+        return cls(load_calls(path), **kwargs)
+
+    def _take(self, queue: Deque[RecordedCall]) -> Optional[RecordedCall]:
+        # Calls taken through the other index are skipped lazily
+        while queue and queue[0].call_id in self._used:
+            queue.popleft()
+        if not queue:
+            return None
+        call = queue.popleft()
+        self._used.add(call.call_id)
+        return call
+
+    def _match(self, request, streaming: bool, context) -> RecordedCall:
+        command = request.header.command
+        with self._lock:
+            call = self._take(self._by_key[(streaming, command, request.request_body_json)])
+            if call is None and not self.strict:
+                call = self._take(self._by_command[(streaming, command)])
+            if call is not None:
+                self.served += 1
+            else:
+                self.misses[command] += 1
+        if call is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"no recorded {_command_name(command)} call")
+        return call
+
+    def _wait_until(self, started_at: float, delay: float) -> None:
+        if self.speed > 0:
+            remaining = started_at + delay / self.speed - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _finish(self, call: RecordedCall, started_at: float, context) -> None:
+        if call.error is None:
+            return
+        code, details = call.error
+        if code == "CANCELLED":
+            while context.is_active():
+                time.sleep(0.05)
+            return
+        self._wait_until(started_at, call.ended_at - call.started_at)
+        context.abort(grpc.StatusCode[code], details)
+
+    def SendGrpcRequest(self, request, context):
+        started_at = time.monotonic()
+        call = self._match(request, False, context)
+        if not call.responses:
+            self._finish(call, started_at, context)
+            context.abort(grpc.StatusCode.UNKNOWN, "recorded call has no response")
+        offset, response = call.responses[-1]
+        self._wait_until(started_at, offset - call.started_at)
+        return response
+
+    def SendGrpcStreamingRequest(self, request, context):
+        started_at = time.monotonic()
+        call = self._match(request, True, context)
+        for offset, response in call.responses:
+            self._wait_until(started_at, offset - call.started_at)
+            if not context.is_active():
+                return
+            yield response
+        self._finish(call, started_at, context)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "served": self.served,
+                "unused": self.total - len(self._used),
+                "misses": {_command_name(command): count for command, count in self.misses.items()},
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PTSL log inspection and replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="Summarize a log")
+    info.add_argument("log")
+    replay = commands.add_parser("serve", help="Serve a log as a stand-in PTSL server")
+    replay.add_argument("log")
+    replay.add_argument("--port", type=int, default=31416)
+    replay.add_argument("--speed", type=float, default=1.0, help="Playback speed (0: no delays)")
+    replay.add_argument("--strict", action="store_true", help="Only answer requests with an identical body")
+    args = parser.parse_args()
+
+    calls = load_calls(args.log)
+    if args.command == "info":
+        duration = max((c.ended_at for c in calls), default=0.0)
+        print(f"{len(calls)} calls over {duration:.1f}s")
+        print(json.dumps(summarize(calls), indent=2))
+        return
+
+    from ptsl_fake_server import serve
+
+    servicer = ReplayServicer(calls, speed=args.speed, strict=args.strict)
+    server = serve(servicer, port=args.port)
+    print(f"Replaying {len(calls)} calls from {args.log} on localhost:{args.port} at {args.speed:g}x")
+    try:
+        server.wait_for_termination()
+    except KeyboardInterrupt:
+        server.stop(0)
+        print(json.dumps(servicer.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
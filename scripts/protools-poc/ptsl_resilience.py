@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Resilient PTSL transport
+Per-command deadlines, jittered retries for read-only getters and a
+circuit breaker that fails fast while Pro Tools is busy or unreachable
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+import grpc
+import ptsl_proto
+from ptsl_client import READ_ONLY_COMMANDS, CommandId, PTSLClient, PTSLError, _command_name
+
+# Deadlines (seconds). Immediate commands answer from Pro Tools state;
+# everything else goes through its command queue and may wait on edits,
+# imports or bounces.
+IMMEDIATE_COMMANDS = READ_ONLY_COMMANDS | {
+    CommandId.RegisterConnection,
+    CommandId.SubscribeToEvents,
+    CommandId.UnsubscribeFromEvents,
+}
+IMMEDIATE_DEADLINE = 10.0
+QUEUED_DEADLINE = 300.0
+
+# gRPC codes worth retrying / counting against Pro Tools availability
+TRANSIENT_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.ABORTED,
+}
+
+# Command error types meaning "Pro Tools cannot take commands right now"
+BUSY_ERROR_TYPES = {
+    "CEType_OS_ProToolsIsNotAvailable", "OS_ProToolsIsNotAvailable", 10,
+    "CEType_PT_HostNotReady", "PT_HostNotReady", 134,
+    "CEType_PT_CommandTimeout", "PT_CommandTimeout", 137,
+    "CEType_PT_HostIsBusy", "PT_HostIsBusy", 138,
+}
+
+
+class CircuitOpenError(PTSLError):
+    """Rejected without calling Pro Tools: the circuit breaker is open"""
+
+
+def deadline_for(command_id: int) -> float:
+    return IMMEDIATE_DEADLINE if command_id in IMMEDIATE_COMMANDS else QUEUED_DEADLINE
+
+
+def is_transient(error: Exception) -> bool:
+    """Failure caused by Pro Tools being busy or unreachable, not by the request"""
+    if isinstance(error, grpc.RpcError):
+        return error.code() in TRANSIENT_CODES
+    if isinstance(error, PTSLError):
+        return any(e.get("command_error_type") in BUSY_ERROR_TYPES for e in error.errors)
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed: calls pass; `failure_threshold` transient failures in a row open it
+    open: calls fail fast with CircuitOpenError for `reset_timeout` seconds
+    half_open: one trial call; success closes the breaker, failure re-opens it
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("[PTSL] Circuit breaker closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"[PTSL] Circuit breaker open for {self.reset_timeout:g}s after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryMetrics:
+    """Per-command counters: calls, retries, exhausted (gave up after retrying), rejected (breaker open)"""
+
+    def __init__(self):
+        self.calls: Dict[int, int] = defaultdict(int)
+        self.retries: Dict[int, int] = defaultdict(int)
+        self.exhausted: Dict[int, int] = defaultdict(int)
+        self.rejected: Dict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def increment(self, counter: str, command_id: int) -> None:
+        with self._lock:
+            getattr(self, counter)[command_id] += 1
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                _command_name(command): {
+                    "calls": self.calls[command],
+                    "retries": self.retries[command],
+                    "exhausted": self.exhausted[command],
+                    "rejected": self.rejected[command],
+                }
+                for command in sorted(set(self.calls) | set(self.rejected))
+            }
+
+
+class ResilientPTSLClient(PTSLClient):
+    """
+    PTSLClient with deadlines, retries and a circuit breaker
+
+    Every command gets a deadline from its class unless `timeout` is given;
+    so does the implicit RegisterConnection (first call, expired session).
+    Read-only commands are retried on transient failures up to
+    `max_attempts` times with full-jitter exponential backoff; other
+    commands are never retried, since a timed-out edit may still have been
+    applied. Transient failures feed the circuit breaker, once per failed
+    RPC even when coalesced callers share it.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_attempts: int = 3,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = RetryMetrics()
+
+    def _record_failure(self, error: Exception) -> None:
+        # Coalesced callers (and a command around its implicit registration) see the same exception object
+        if getattr(error, "_ptsl_breaker_counted", False):
+            return
+        try:
+            error._ptsl_breaker_counted = True
+        except AttributeError:
+            pass
+        self.breaker.record_failure()
+
+    def register(self, timeout: Optional[float] = None) -> str:
+        """RegisterConnection under its deadline (or the calling command's, if sooner); transient failures feed the breaker"""
+        deadline = deadline_for(CommandId.RegisterConnection)
+        timeout = deadline if timeout is None else min(timeout, deadline)
+        try:
+            session_id = super().register(timeout)
+        except Exception as e:
+            if is_transient(e):
+                self._record_failure(e)
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return session_id
+
+    def send_command(
+        self,
+        command_id: int,
+        body_json: str = "{}",
+        timeout: Optional[float] = None,
+        versioned_header_json: str = "",
+    ) -> ptsl_proto.Response:
+        timeout = timeout if timeout is not None else deadline_for(command_id)
+        attempts = self.max_attempts if command_id in READ_ONLY_COMMANDS else 1
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self.metrics.increment("rejected", command_id)
+                raise CircuitOpenError(command_id, "circuit breaker open, Pro Tools busy or unreachable")
+            self.metrics.increment("calls", command_id)
+            try:
+                response = super().send_command(command_id, body_json, timeout, versioned_header_json)
+            except Exception as e:
+                if not is_transient(e):
+                    # Pro Tools answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                self._record_failure(e)
+                if attempt == attempts - 1:
+                    if attempts > 1:
+                        self.metrics.increment("exhausted", command_id)
+                    raise
+                self.metrics.increment("retries", command_id)
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+                continue
+            self.breaker.record_success()
+            return response
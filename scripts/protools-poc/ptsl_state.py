@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Client-side mirror of Pro Tools session state
+Loaded through the (paginated) getters, then kept current from PollEvents
+track events so hub reads are served from memory; every entry is
+revalidated once it is older than its TTL
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ptsl_client import CommandId, PTSLClient
+from ptsl_events import COALESCE, Event, EventStream
+from ptsl_pagination import iter_tracks
+from ptsl_subscriptions import TRACK_STATE_EVENT_IDS, SubscriptionManager
+
+# Track state events and the TrackAttributes flag each one sets
+TRACK_ATTRIBUTE_EVENTS = {
+    "EId_TrackMuteStateChanged": "is_muted",
+    "EId_TrackSoloStateChanged": "is_soloed",
+    "EId_TrackRecordEnabledStateChanged": "is_record_enabled",
+}
+
+# Session lifecycle events: everything cached belongs to the old session
+SESSION_EVENT_IDS = ("EId_SessionOpened", "EId_SessionCreated", "EId_SessionClosed")
+
+# Scalar getters: field -> (command, response key)
+SCALAR_GETTERS = {
+    "transport_state": (CommandId.GetTransportState, "current_setting"),
+    "record_mode": (CommandId.GetRecordMode, "current_setting"),
+    "session_name": (CommandId.GetSessionName, "session_name"),
+    "sample_rate": (CommandId.GetSessionSampleRate, "sample_rate"),
+}
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+class SessionState:
+    """
+    Cached session state with TTL revalidation
+
+    ttl: maximum age (seconds) of scalar values (transport, record mode,
+         name, sample rate). PTSL has no events for these, so the TTL is
+         their only staleness bound.
+    track_ttl: maximum age of the track list. Mute/solo/rec-enable are
+         patched from events in between; the TTL bounds how long added,
+         removed or renamed tracks (no events for those) go unnoticed.
+
+    None disables expiry. Session open/create/close events and stream
+    reconnects (events may have been missed) drop the whole cache.
+    """
+
+    def __init__(
+        self,
+        client: PTSLClient,
+        ttl: Optional[float] = 2.0,
+        track_ttl: Optional[float] = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.track_ttl = track_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.events_applied = 0
+
+        self._scalars: Dict[str, _Entry] = {}
+        self._tracks: Optional[_Entry] = None  # value: track_id -> track dict (list order kept)
+        self._lock = threading.RLock()
+        self._subscriptions: Optional[SubscriptionManager] = None
+        self._consumer: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _fresh(self, entry: Optional[_Entry], ttl: Optional[float]) -> bool:
+        return entry is not None and (ttl is None or self.clock() - entry.fetched_at < ttl)
+
+    def _scalar(self, field: str) -> str:
+        with self._lock:
+            entry = self._scalars.get(field)
+            if self._fresh(entry, self.ttl):
+                self.hits += 1
+                return entry.value
+        self.misses += 1
+        command, key = SCALAR_GETTERS[field]
+        value = self.client.send(command).get(key, "")
+        with self._lock:
+            self._scalars[field] = _Entry(value, self.clock())
+        return value
+
+    @property
+    def transport_state(self) -> str:
+        return self._scalar("transport_state")
+
+    @property
+    def record_mode(self) -> str:
+        return self._scalar("record_mode")
+
+    @property
+    def session_name(self) -> str:
+        return self._scalar("session_name")
+
+    @property
+    def sample_rate(self) -> str:
+        return self._scalar("sample_rate")
+
+    def _track_map(self) -> Dict[str, dict]:
+        with self._lock:
+            if self._fresh(self._tracks, self.track_ttl):
+                self.hits += 1
+                return self._tracks.value
+        self.misses += 1
+        return self.reload_tracks()
+
+    def tracks(self) -> List[dict]:
+        """All tracks in session order (cached dicts; do not mutate)"""
+        return list(self._track_map().values())
+
+    def track(self, track_id: str) -> Optional[dict]:
+        return self._track_map().get(track_id)
+
+    # ------------------------------------------------------------------
+    # Loading and invalidation
+    # ------------------------------------------------------------------
+
+    def reload_tracks(self) -> Dict[str, dict]:
+        """Re-read the full track list and re-target track event subscriptions"""
+        tracks = {track["id"]: track for track in iter_tracks(self.client)}
+        with self._lock:
+            self._tracks = _Entry(tracks, self.clock())
+        if self._subscriptions is not None:
+            self._subscriptions.set_tracks(list(tracks), TRACK_STATE_EVENT_IDS)
+            self._subscriptions.sync()
+        return tracks
+
+    def load(self) -> "SessionState":
+        """Populate every cached field now instead of on first read"""
+        self.reload_tracks()
+        for field in SCALAR_GETTERS:
+            with self._lock:
+                self._scalars.pop(field, None)
+            self._scalar(field)
+        return self
+
+    def invalidate(self) -> None:
+        """Drop everything; the next read of each field goes to Pro Tools"""
+        with self._lock:
+            self._scalars.clear()
+            self._tracks = None
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def apply(self, event: Event) -> None:
+        """Patch the cache from one decoded PollEvents event"""
+        if event.event_id in SESSION_EVENT_IDS:
+            self.invalidate()
+            return
+        attribute = TRACK_ATTRIBUTE_EVENTS.get(event.event_id)
+        if attribute is None:
+            return
+        with self._lock:
+            if self._tracks is None:
+                return
+            track = self._tracks.value.get(event.data.get("track_id", ""))
+            if track is not None:
+                track.setdefault("track_attributes", {})[attribute] = bool(event.data.get("state"))
+                self.events_applied += 1
+
+    def attach(self, event_stream: EventStream, subscriptions: Optional[SubscriptionManager] = None) -> None:
+        """
+        Follow `event_stream`
+
+        With `subscriptions`, session events and the track events of every
+        cached track are subscribed in Pro Tools and kept in step with the
+        track list.
+        """
+        self._subscriptions = subscriptions
+        if subscriptions is not None:
+            for event_id in SESSION_EVENT_IDS:
+                subscriptions.add(event_id)
+            subscriptions.attach(event_stream)
+
+        queue = event_stream.subscribe(
+            list(TRACK_ATTRIBUTE_EVENTS) + list(SESSION_EVENT_IDS), policy=COALESCE, maxsize=4096
+        )
+
+        def on_connect():
+            # Events may have been missed while the stream was down
+            if event_stream.reconnects:
+                self.invalidate()
+
+        event_stream.add_reconnect_hook(on_connect)
+
+        def consume():
+            for event in queue:
+                self.apply(event)
+
+        self._consumer = threading.Thread(target=consume, name="ptsl-state", daemon=True)
+        self._consumer.start()
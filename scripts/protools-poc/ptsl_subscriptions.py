@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+PTSL event subscription manager
+Keeps the desired set of (event_id, filter) subscriptions and sends only
+the difference to Pro Tools, in bulk SubscribeToEvents/UnsubscribeFromEvents
+(CId 132/136) requests
+"""
+
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ptsl_client import PTSLClient
+
+# Per-track state events the hub follows
+TRACK_STATE_EVENT_IDS = (
+    "EId_TrackMuteStateChanged",
+    "EId_TrackSoloStateChanged",
+    "EId_TrackRecordEnabledStateChanged",
+)
+
+Subscription = Tuple[str, str]  # (event_id, canonical event_data_json)
+
+
+def canonical_filter(event_filter: Optional[dict]) -> str:
+    """Stable JSON for a filter body so equal filters compare equal"""
+    if not event_filter:
+        return ""
+    return json.dumps(event_filter, sort_keys=True, separators=(",", ":"))
+
+
+class SubscriptionManager:
+    """
+    Desired-state event subscriptions
+
+    Mutators (add/remove/add_track/remove_track/set_tracks) only change the
+    desired set; `sync()` sends the minimal subscribe/unsubscribe diff in
+    chunks of `batch_size` events. After a PollEvents reconnect, `reapply()`
+    re-sends the full desired set (see `attach`).
+    """
+
+    def __init__(self, client: PTSLClient, batch_size: int = 500):
+        self.client = client
+        self.batch_size = batch_size
+        self.requests_sent = 0
+
+        self._desired: Set[Subscription] = set()
+        self._applied: Set[Subscription] = set()
+        self._tracks: Dict[str, Tuple[str, ...]] = {}  # track_id -> followed event ids
+        self._lock = threading.RLock()
+
+    @property
+    def desired(self) -> Set[Subscription]:
+        with self._lock:
+            return set(self._desired)
+
+    # ------------------------------------------------------------------
+    # Desired state
+    # ------------------------------------------------------------------
+
+    def add(self, event_id: str, event_filter: Optional[dict] = None) -> None:
+        with self._lock:
+            self._desired.add((event_id, canonical_filter(event_filter)))
+
+    def remove(self, event_id: str, event_filter: Optional[dict] = None) -> None:
+        with self._lock:
+            self._desired.discard((event_id, canonical_filter(event_filter)))
+
+    def _track_subscriptions(self, track_id: str, event_ids: Iterable[str]) -> List[Subscription]:
+        event_filter = canonical_filter({"track_id": track_id})
+        return [(event_id, event_filter) for event_id in event_ids]
+
+    def add_track(self, track_id: str, event_ids: Iterable[str] = TRACK_STATE_EVENT_IDS) -> None:
+        with self._lock:
+            self.remove_track(track_id)
+            self._tracks[track_id] = tuple(event_ids)
+            self._desired.update(self._track_subscriptions(track_id, self._tracks[track_id]))
+
+    def remove_track(self, track_id: str) -> None:
+        with self._lock:
+            event_ids = self._tracks.pop(track_id, ())
+            self._desired.difference_update(self._track_subscriptions(track_id, event_ids))
+
+    def set_tracks(self, track_ids: Iterable[str], event_ids: Iterable[str] = TRACK_STATE_EVENT_IDS) -> None:
+        """Follow exactly `track_ids` (tracks added earlier but not listed are dropped)"""
+        event_ids = tuple(event_ids)
+        track_ids = set(track_ids)
+        with self._lock:
+            for track_id in [t for t in self._tracks if t not in track_ids]:
+                self.remove_track(track_id)
+            for track_id in track_ids:
+                if self._tracks.get(track_id) != event_ids:
+                    self.add_track(track_id, event_ids)
+
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+
+    def _send(self, subscriptions: List[Subscription], subscribe: bool) -> None:
+        send = self.client.subscribe_to_events if subscribe else self.client.unsubscribe_from_events
+        for start in range(0, len(subscriptions), self.batch_size):
+            chunk = subscriptions[start:start + self.batch_size]
+            send([{"event_id": event_id, "event_data_json": data} for event_id, data in chunk])
+            self.requests_sent += 1
+            # Record progress per chunk so a failure mid-way resumes correctly
+            if subscribe:
+                self._applied.update(chunk)
+            else:
+                self._applied.difference_update(chunk)
+
+    def sync(self) -> Tuple[int, int]:
+        """Send the diff between desired and applied; returns (subscribed, unsubscribed)"""
+        with self._lock:
+            to_unsubscribe = sorted(self._applied - self._desired)
+            to_subscribe = sorted(self._desired - self._applied)
+            if to_unsubscribe:
+                self._send(to_unsubscribe, subscribe=False)
+            if to_subscribe:
+                self._send(to_subscribe, subscribe=True)
+            return len(to_subscribe), len(to_unsubscribe)
+
+    def reapply(self) -> int:
+        """Re-send the full desired set (server-side subscriptions were lost)"""
+        with self._lock:
+            self._applied.clear()
+            subscribed, _ = self.sync()
+            return subscribed
+
+    def attach(self, event_stream) -> None:
+        """Re-apply subscriptions whenever `event_stream` (ptsl_events.EventStream) reconnects"""
+        event_stream.add_reconnect_hook(self.reapply)
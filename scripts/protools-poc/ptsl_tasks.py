@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Long-running PTSL command tracking
+Runs commands such as ExportMix (CId 28) or Import (CId 2) as streamed
+tasks on one background event loop and channel, returning a future per
+task; progress comes from the stream and from polling GetTaskStatus (CId 12)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, List, Optional
+
+import ptsl_json
+import ptsl_proto
+from ptsl_aio_client import AsyncPTSLClient
+from ptsl_client import PTSL_SERVER, CommandId, check_response
+
+# TaskStatus values that end a task (see PTSL.proto)
+TERMINAL_STATUSES = {
+    "TStatus_Completed",
+    "TStatus_Failed",
+    "TStatus_CompletedWithBadResponse",
+    "TStatus_FailedWithBadErrorResponse",
+}
+
+
+def status_name(status) -> str:
+    """TaskStatus number or (possibly deprecated, unprefixed) name -> TStatus_* name"""
+    if isinstance(status, int):
+        status = ptsl_proto.TaskStatus.Name(status)
+    return status if status.startswith("TStatus_") else f"TStatus_{status}"
+
+
+class TaskFuture(Future):
+    """
+    Future of a long-running command's parsed response body
+
+    task_id, status and progress (0-100) are updated while it runs;
+    progress callbacks are called from the tracker's loop thread.
+    """
+
+    def __init__(self, command_id: int):
+        super().__init__()
+        self.command_id = command_id
+        self.task_id = ""
+        self.status = "TStatus_Queued"
+        self.progress = 0
+        self.polls = 0
+        self._progress_callbacks: List[Callable[["TaskFuture"], None]] = []
+
+    def add_progress_callback(self, callback: Callable[["TaskFuture"], None]) -> None:
+        self._progress_callbacks.append(callback)
+
+    def _update(self, status: str, progress: int) -> None:
+        changed = progress != self.progress or status != self.status
+        self.status, self.progress = status, progress
+        if changed:
+            for callback in self._progress_callbacks:
+                callback(self)
+
+
+class TaskTracker:
+    """
+    Submit long-running commands without a thread per command
+
+    All tasks share one grpc.aio channel and one event-loop thread. Each
+    task is a SendGrpcStreamingRequest; while it runs, GetTaskStatus is
+    polled with adaptive backoff: `poll_initial` after every progress
+    change, growing by `poll_factor` up to `poll_max` while progress stalls.
+    PTSL has no per-task events, so polling is the only progress source
+    besides the stream itself.
+    """
+
+    def __init__(
+        self,
+        address: str = PTSL_SERVER,
+        max_in_flight: int = 16,
+        poll_initial: float = 0.1,
+        poll_max: float = 2.0,
+        poll_factor: float = 1.5,
+    ):
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ptsl-tasks", daemon=True)
+        self._thread.start()
+        self._client = self._call(self._make_client(address))
+        self._slots = self._call(self._make_semaphore(max_in_flight))
+
+    async def _make_client(self, address: str) -> AsyncPTSLClient:
+        return AsyncPTSLClient(address)
+
+    async def _make_semaphore(self, value: int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(value)
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._call(self._client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    # ------------------------------------------------------------------
+
+    def submit(self, command_id: int, body: Optional[dict] = None, timeout: Optional[float] = None) -> TaskFuture:
+        """Start a command as a tracked task; safe to call from any thread"""
+        future = TaskFuture(command_id)
+        body_json = ptsl_json.dumps_body(body)
+        asyncio.run_coroutine_threadsafe(self._run(future, body_json, timeout), self._loop)
+        return future
+
+    async def _run(self, future: TaskFuture, body_json: str, timeout: Optional[float]) -> None:
+        poller = None
+        try:
+            async with self._slots:
+                if future.cancelled():
+                    return
+                call = await self._client.open_stream(future.command_id, body_json, timeout=timeout)
+
+                def cancel_call(done: Future) -> None:
+                    if done.cancelled():
+                        self._loop.call_soon_threadsafe(call.cancel)
+
+                future.add_done_callback(cancel_call)
+                async for response in call:
+                    check_response(future.command_id, response)
+                    status = status_name(response.header.status)
+                    future.task_id = response.header.task_id or future.task_id
+                    if status in TERMINAL_STATUSES:
+                        future._update(status, 100)
+                        body = ptsl_json.loads_body(response.response_body_json)
+                        if not future.cancelled():
+                            future.set_result(body)
+                        return
+                    future._update(status, response.header.progress)
+                    if poller is None and future.task_id:
+                        poller = asyncio.ensure_future(self._poll(future))
+            if not future.done():
+                future.set_exception(RuntimeError(f"Task {future.task_id} stream ended without a final response"))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            if poller is not None:
+                poller.cancel()
+
+    async def _poll(self, future: TaskFuture) -> None:
+        """GetTaskStatus until the task ends; back off while progress stalls"""
+        delay = self.poll_initial
+        while not future.done():
+            await asyncio.sleep(delay)
+            try:
+                body = await self._client.send(CommandId.GetTaskStatus, {"task_id": future.task_id})
+            except Exception as e:
+                print(f"[PTSL] GetTaskStatus {future.task_id} failed: {e}")
+                delay = min(self.poll_max, delay * self.poll_factor)
+                continue
+            future.polls += 1
+            status = status_name(body.get("status", future.status))
+            progress = body.get("progress", future.progress)
+            if future.done() or status in TERMINAL_STATUSES:
+                return  # The stream delivers the result
+            moved = progress != future.progress
+            future._update(status, progress)
+            delay = self.poll_initial if moved else min(self.poll_max, delay * self.poll_factor)
+
+
+def wait_all(futures: List[TaskFuture], progress_interval: Optional[float] = None) -> None:
+    """Block until all tasks finish, optionally printing progress every `progress_interval` s"""
+    pending = {f for f in futures if not f.done()}
+    while pending:
+        _, pending = wait(pending, timeout=progress_interval, return_when=FIRST_COMPLETED)
+        if progress_interval and pending:
+            average = sum(f.progress for f in futures) / len(futures)
+            print(f"[PTSL] {len(futures) - len(pending)}/{len(futures)} tasks done, avg progress {average:.0f}%")
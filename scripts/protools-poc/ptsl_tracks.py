@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Track index
+Compact in-memory index of the session's tracks, built from GetTrackList
+pages, with O(1) lookup by id, name and type; commands that take names
+(GetTrackControlInfo, ...) and events that carry ids meet here
+"""
+
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from ptsl_client import PTSLClient
+from ptsl_events import Event
+from ptsl_pagination import iter_tracks
+from ptsl_state import SESSION_EVENT_IDS, TRACK_ATTRIBUTE_EVENTS
+
+
+class TrackRecord:
+    """One track: id, name, type, index and its TrackAttributes dict"""
+
+    __slots__ = ("id", "name", "type", "index", "attributes")
+
+    def __init__(self, track_id: str, name: str, track_type: str, index: int = 0, attributes: Optional[dict] = None):
+        self.id = track_id
+        self.name = name
+        self.type = track_type
+        self.index = index
+        self.attributes = attributes if attributes is not None else {}
+
+    @classmethod
+    def from_dict(cls, track: dict) -> "TrackRecord":
+        """From a GetTrackList `track_list` entry"""
+        return cls(
+            track.get("id", ""),
+            track.get("name", ""),
+            track.get("type", "TT_Unknown"),
+            track.get("index", 0),
+            track.get("track_attributes"),
+        )
+
+    def __repr__(self) -> str:
+        return f"TrackRecord({self.name!r}, {self.type}, id={self.id[:12]})"
+
+
+class TrackIndex:
+    """
+    Tracks by id, name and type
+
+        index = TrackIndex.load(client)
+        client.get_track_control_info([index.name_for(event.data["track_id"])])
+
+    Lookups are dict reads: no round trip and no scan, whatever the
+    session size. Iteration follows session order (GetTrackList order,
+    then tracks added later). Mutations take a lock; reads do not: readers
+    that iterate copy the map first (`list(d)` is a single step for the
+    interpreter), so `add`/`remove`/`rename` never change a map under them.
+
+    PTSL only has events for mute, solo and record-enable (patched by
+    `apply`) and for session open/create/close (which clear the index);
+    there are no track added/removed/renamed events. `add`, `remove` and
+    `rename` apply such changes in O(1) when the hub makes them itself
+    (e.g. after an Import), and `refresh` re-reads GetTrackList to pick
+    up changes made in Pro Tools.
+    """
+
+    def __init__(self, tracks: Iterable[dict] = ()):
+        self._by_id: Dict[str, TrackRecord] = {}
+        self._by_name: Dict[str, TrackRecord] = {}
+        self._by_type: Dict[str, Dict[str, TrackRecord]] = {}
+        self._lock = threading.Lock()
+        self.events_applied = 0
+        for track in tracks:
+            self._insert(TrackRecord.from_dict(track))
+
+    @classmethod
+    def load(cls, client: PTSLClient, **kwargs) -> "TrackIndex":
+        """Index every track via GetTrackList pages (kwargs go to iter_tracks)"""
+        return cls(iter_tracks(client, **kwargs))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._by_id
+
+    def __iter__(self) -> Iterator[TrackRecord]:
+        return iter(list(self._by_id.values()))
+
+    def by_id(self, track_id: str) -> Optional[TrackRecord]:
+        return self._by_id.get(track_id)
+
+    def by_name(self, name: str) -> Optional[TrackRecord]:
+        return self._by_name.get(name)
+
+    def of_type(self, track_type: str) -> List[TrackRecord]:
+        """Tracks of one TrackType (e.g. "TT_Midi") in session order"""
+        return list(self._by_type.get(track_type, {}).values())
+
+    def types(self) -> Dict[str, int]:
+        """TrackType -> number of tracks"""
+        return {track_type: len(tracks) for track_type, tracks in list(self._by_type.items())}
+
+    def name_for(self, track_id: str) -> Optional[str]:
+        record = self._by_id.get(track_id)
+        return record.name if record is not None else None
+
+    def id_for(self, name: str) -> Optional[str]:
+        record = self._by_name.get(name)
+        return record.id if record is not None else None
+
+    def names_for(self, track_ids: Iterable[str]) -> List[str]:
+        """Names of the known tracks among `track_ids` (unknown ids are skipped)"""
+        records = (self._by_id.get(i) for i in track_ids)
+        return [record.name for record in records if record is not None]
+
+    def ids_for(self, names: Iterable[str]) -> List[str]:
+        """Ids of the known tracks among `names` (unknown names are skipped)"""
+        records = (self._by_name.get(n) for n in names)
+        return [record.id for record in records if record is not None]
+
+    def ids(self) -> List[str]:
+        return list(self._by_id)
+
+    def names(self) -> List[str]:
+        return [record.name for record in list(self._by_id.values())]
+
+    # ------------------------------------------------------------------
+    # Changes
+    # ------------------------------------------------------------------
+
+    def _insert(self, record: TrackRecord) -> None:
+        self._by_id[record.id] = record
+        self._by_name[record.name] = record
+        self._by_type.setdefault(record.type, {})[record.id] = record
+
+    def _discard(self, record: TrackRecord) -> None:
+        del self._by_id[record.id]
+        if self._by_name.get(record.name) is record:
+            del self._by_name[record.name]
+        tracks = self._by_type.get(record.type, {})
+        tracks.pop(record.id, None)
+        if not tracks:
+            self._by_type.pop(record.type, None)
+
+    def add(self, track: dict) -> TrackRecord:
+        """Add (or replace, by id) one track from a GetTrackList-style dict"""
+        record = TrackRecord.from_dict(track)
+        with self._lock:
+            existing = self._by_id.get(record.id)
+            if existing is not None:
+                self._discard(existing)
+            self._insert(record)
+        return record
+
+    def remove(self, track_id: str) -> Optional[TrackRecord]:
+        with self._lock:
+            record = self._by_id.get(track_id)
+            if record is not None:
+                self._discard(record)
+        return record
+
+    def rename(self, track_id: str, name: str) -> Optional[TrackRecord]:
+        with self._lock:
+            record = self._by_id.get(track_id)
+            if record is None:
+                return None
+            if self._by_name.get(record.name) is record:
+                del self._by_name[record.name]
+            record.name = name
+            self._by_name[name] = record
+        return record
+
+    def clear(self) -> None:
+        with self._lock:
+            # New maps rather than clearing in place: lock-free readers iterating the old ones stay valid
+            self._by_id, self._by_name, self._by_type = {}, {}, {}
+
+    def refresh(self, client: PTSLClient, **kwargs) -> Dict[str, list]:
+        """
+        Re-read GetTrackList and report what changed
+
+        Records of tracks that still exist are updated in place (holders
+        keep valid references); the maps are rebuilt in the new session
+        order. Returns {"added", "removed", "renamed"} lists of track ids.
+        """
+        fresh = [TrackRecord.from_dict(track) for track in iter_tracks(client, **kwargs)]
+        changes = {"added": [], "removed": [], "renamed": []}
+        with self._lock:
+            old = dict(self._by_id)
+            records = []
+            for record in fresh:
+                previous = old.pop(record.id, None)
+                if previous is None:
+                    changes["added"].append(record.id)
+                else:
+                    if previous.name != record.name:
+                        changes["renamed"].append(record.id)
+                    previous.name, previous.type, previous.index = record.name, record.type, record.index
+                    previous.attributes = record.attributes
+                    record = previous
+                records.append(record)
+            changes["removed"] = list(old)
+            # Built aside and swapped in together so lock-free readers never see a half-built index
+            by_id, by_name, by_type = {}, {}, {}
+            for record in records:
+                by_id[record.id] = record
+                by_name[record.name] = record
+                by_type.setdefault(record.type, {})[record.id] = record
+            self._by_id, self._by_name, self._by_type = by_id, by_name, by_type
+        return changes
+
+    def apply(self, event: Event) -> None:
+        """Patch the index from one decoded PollEvents event"""
+        if event.event_id in SESSION_EVENT_IDS:
+            self.clear()
+            return
+        attribute = TRACK_ATTRIBUTE_EVENTS.get(event.event_id)
+        if attribute is None:
+            return
+        record = self._by_id.get(event.data.get("track_id", ""))
+        if record is not None:
+            record.attributes[attribute] = bool(event.data.get("state"))
+            self.events_applied += 1